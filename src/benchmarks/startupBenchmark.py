@@ -0,0 +1,66 @@
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = SRC_DIR.parent
+
+# heavy dependencies the pipeline used to import at module load
+HEAVY_MODULES = ["googleapiclient.discovery", "nltk.sentiment.vader", "pandas", "pytrends.request"]
+
+
+class StartupBenchmark:
+	"""
+	Measures cold start time of the pipeline CLI
+	every sample is a fresh interpreter so nothing is cached between runs,
+	same as a cron triggered run
+	"""
+
+	def __init__(self, runs: int = 5):
+		self.runs = runs
+
+	def _timeCommand(self, args) -> float | None:
+		start = time.perf_counter()
+		proc = subprocess.run([sys.executable] + args, cwd=PROJECT_ROOT, capture_output=True)
+		elapsed = time.perf_counter() - start
+		if proc.returncode != 0:
+			return None
+		return elapsed
+
+	def measure(self, label: str, args) -> dict:
+		samples = []
+		for _ in range(self.runs):
+			elapsed = self._timeCommand(args)
+			if elapsed is None:
+				print(f"{label}: command failed (dependency not installed?), skipping")
+				return {"label": label, "median": None}
+			samples.append(elapsed)
+
+		result = {"label": label, "median": statistics.median(samples), "min": min(samples)}
+		print(f"{label:<40} median {result['median'] * 1000:8.1f} ms   min {result['min'] * 1000:8.1f} ms")
+		return result
+
+	def run(self) -> list:
+		print(f"Startup benchmark ({self.runs} runs each, {sys.executable})")
+		results = [
+			self.measure("bare interpreter", ["-c", "pass"]),
+			self.measure("import pipeline", ["-c", f"import sys; sys.path.insert(0, {str(SRC_DIR)!r}); import pipeline"]),
+			self.measure("pipeline.py --help", [str(SRC_DIR / "pipeline.py"), "--help"])
+		]
+
+		# what the old eager imports would have cost on top
+		for module in HEAVY_MODULES:
+			results.append(self.measure(f"import {module}", ["-c", f"import {module}"]))
+
+		return results
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Pipeline CLI startup benchmark")
+	parser.add_argument("--runs", type=int, default=5, help="Samples per command")
+	args = parser.parse_args()
+
+	StartupBenchmark(runs=args.runs).run()
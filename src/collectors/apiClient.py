@@ -0,0 +1,69 @@
+import threading
+
+# process wide cache of YouTube API clients
+# httplib2 is not thread safe so each thread builds and keeps its own client (threading.local,
+# dropped with the thread), and googleapiclient still parses the discovery document for every
+# client it builds. What is shared is the googleapiclient import and the read of the discovery
+# document off disk, so a new thread only pays for the build itself
+_local = threading.local()
+_discoveryDoc = None
+_lock = threading.Lock()
+# bumped by clearClients so threads drop clients built before it
+_generation = 0
+
+
+def _getDiscoveryDoc():
+	# the youtube v3 discovery document ships with googleapiclient, read it off disk once
+	global _discoveryDoc
+	if _discoveryDoc is None:
+		from googleapiclient.discovery_cache import get_static_doc
+		_discoveryDoc = get_static_doc("youtube", "v3")
+	return _discoveryDoc
+
+
+def preloadDiscovery(apiKey: str | None = None):
+	# imports googleapiclient and reads the discovery document so the first client on any thread builds faster
+	# clients themselves are per thread, so there is nothing else worth building ahead of time
+	if not apiKey or apiKey.startswith("fake"):
+		return
+	import googleapiclient.discovery
+	with _lock:
+		_getDiscoveryDoc()
+
+
+def getYoutubeClient(apiKey: str):
+	"""
+	returns this thread's youtube v3 client for this api key, built on first use
+	googleapiclient is only imported the first time a client is actually needed
+	"""
+	if getattr(_local, "generation", None) != _generation:
+		_local.clients = {}
+		_local.generation = _generation
+	client = _local.clients.get(apiKey)
+	if client is not None:
+		return client
+
+	if apiKey and apiKey.startswith("fake"):
+		# offline client for local runs and sharding tests
+		from collectors.fakeYoutubeClient import FakeYoutubeClient
+		client = _local.clients[apiKey] = FakeYoutubeClient()
+		return client
+
+	import googleapiclient.discovery
+
+	with _lock:
+		doc = _getDiscoveryDoc()
+
+	if doc:
+		client = googleapiclient.discovery.build_from_document(doc, developerKey=apiKey)
+	else:
+		client = googleapiclient.discovery.build("youtube", "v3", developerKey=apiKey)
+
+	_local.clients[apiKey] = client
+	return client
+
+
+def clearClients():
+	# drops cached clients on every thread, e.g. after rotating an api key
+	global _generation
+	_generation += 1
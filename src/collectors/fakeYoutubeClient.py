@@ -0,0 +1,98 @@
+import hashlib
+from datetime import datetime, timedelta
+
+# Offline stand-in for the googleapiclient youtube v3 resource
+# covers the calls YoutubeCollector makes and returns deterministic made up data,
+# so sharded collection and the rest of the pipeline can be run locally without a key or quota
+# selected by giving an api key that starts with "fake" (e.g. YOUTUBE_API_KEYS=fake1,fake2)
+
+CATEGORIES = {"24": "Entertainment", "10": "Music", "20": "Gaming", "27": "Education", "26": "Howto & Style"}
+
+
+def _seed(*parts) -> int:
+	return int.from_bytes(hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=4).digest(), "big")
+
+
+class _Request:
+	def __init__(self, response):
+		self.response = response
+
+	def execute(self):
+		return self.response
+
+
+class _VideoCategories:
+	def list(self, part="snippet", regionCode="US"):
+		return _Request({"items": [
+			{"id": catId, "snippet": {"title": title, "assignable": True}} for catId, title in CATEGORIES.items()
+		]})
+
+
+class _Search:
+	def list(self, videoCategoryId=None, maxResults=30, q="", **params):
+		# a new batch of videos every hour so repeated runs discover something
+		hour = datetime.utcnow().strftime("%Y%m%d%H")
+		items = []
+		for i in range(maxResults):
+			videoId = f"fake{_seed(videoCategoryId, hour, i):08x}"[:11]
+			items.append({
+				"id": {"kind": "youtube#video", "videoId": videoId},
+				"snippet": {
+					"title": f"Fake {q or 'video'} {i}",
+					"channelTitle": f"Channel {i % 7}",
+					"channelId": f"UCfake{i % 7}",
+					"publishedAt": (datetime.utcnow() - timedelta(hours=i)).isoformat() + "Z",
+					"description": "generated by fakeYoutubeClient",
+					"thumbnails": {"medium": {"url": ""}}
+				}
+			})
+		return _Request({"items": items})
+
+
+class _Videos:
+	def list(self, part="statistics", id=""):
+		# counts grow with wall clock time so consecutive polls show growth
+		now = datetime.utcnow().timestamp()
+		items = []
+		for videoId in filter(None, id.split(",")):
+			base = _seed(videoId)
+			views = base % 5000 + int(now / 60) % 100000 * (base % 7 + 1)
+			items.append({
+				"id": videoId,
+				"snippet": {"categoryId": list(CATEGORIES)[base % len(CATEGORIES)]},
+				"statistics": {"viewCount": str(views), "likeCount": str(views // 25), "commentCount": str(views // 400)}
+			})
+		return _Request({"items": items})
+
+
+class _CommentThreads:
+	WORDS = ["great video", "love this", "terrible audio", "first", "so helpful", "not sure about this", "amazing work"]
+
+	def list(self, videoId=None, maxResults=25, **params):
+		count = min(_seed(videoId, datetime.utcnow().strftime("%Y%m%d")) % (maxResults + 1), maxResults)
+		items = []
+		for i in range(count):
+			items.append({"snippet": {"topLevelComment": {"snippet": {
+				"textDisplay": self.WORDS[_seed(videoId, i) % len(self.WORDS)],
+				"authorDisplayName": f"@fakeUser{i}",
+				"likeCount": i,
+				"publishedAt": (datetime.utcnow() - timedelta(minutes=i * 13)).isoformat() + "Z"
+			}}}})
+		return _Request({"items": items})
+
+	def list_next(self, request, response):
+		return None
+
+
+class FakeYoutubeClient:
+	def videoCategories(self):
+		return _VideoCategories()
+
+	def search(self):
+		return _Search()
+
+	def videos(self):
+		return _Videos()
+
+	def commentThreads(self):
+		return _CommentThreads()
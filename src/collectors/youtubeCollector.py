@@ -1,18 +1,51 @@
 import os
 import json
+import threading
 from datetime import datetime, timedelta
-import googleapiclient.discovery
-from googleapiclient.errors import HttpError
+
+from collectors.apiClient import getYoutubeClient
+from processing.storage import loadJson, writeJson, findData, isCompressed
+
+
+class QuotaExceededError(Exception):
+	# raised instead of swallowed so a run stops once the daily API quota is gone
+	pass
+
+
+# YouTube Data API v3 quota cost per request
+QUOTA_COSTS = {"search": 100, "videos": 1, "commentThreads": 1, "videoCategories": 1}
+
+
+def _isQuotaError(e) -> bool:
+	content = e.content.decode("utf-8") if isinstance(e.content, bytes) else str(e.content)
+	return e.resp.status in (403, 429) and any(reason in content for reason in ("quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded"))
+
 
 class YoutubeCollector:
-	def __init__(self, apiKey, baseDir="data/raw/youtube"):
+	def __init__(self, apiKey, baseDir="data/raw/youtube", quotaBudget=None):
 		self.apiKey = apiKey
 		self.baseDir = baseDir
-		self.youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=self.apiKey)
+		# optional cap on quota units this collector may spend, sharded workers each get their own
+		self.quotaBudget = quotaBudget
+		self.quotaUsed = 0
+		# stats and comment stages spend from the same budget at the same time
+		self._quotaLock = threading.Lock()
 		os.makedirs(self.baseDir, exist_ok=True)
 		os.makedirs(os.path.join(self.baseDir, "baselines"), exist_ok=True)
 		os.makedirs(os.path.join(self.baseDir, "lifecycleTracking"), exist_ok=True)
 
+	@property
+	def youtube(self):
+		# this thread's cached client, pipeline stages fetch stats and comments at the same time on different threads
+		return getYoutubeClient(self.apiKey)
+
+	def _spendQuota(self, endpoint):
+		cost = QUOTA_COSTS[endpoint]
+		with self._quotaLock:
+			if self.quotaBudget is not None and self.quotaUsed + cost > self.quotaBudget:
+				raise QuotaExceededError(f"Quota budget of {self.quotaBudget} units used up ({self.quotaUsed} spent)")
+			self.quotaUsed += cost
+
 	def getVideoCategories(self, regionCode="US"):
 		"""
 		fetches video categories so that data pulled is
@@ -21,6 +54,7 @@ class YoutubeCollector:
 		Returns: a dictionary of categories and their IDs
 		"""
 		try:
+			self._spendQuota("videoCategories")
 			request = self.youtube.videoCategories().list(
 				part="snippet",
 				regionCode=regionCode
@@ -35,12 +69,14 @@ class YoutubeCollector:
 					categories[title] = catId
 
 			outputFile = os.path.join(self.baseDir, f"categories_{regionCode}.json")
-			with open(outputFile, "w", encoding="utf-8") as f:
-				json.dump(categories, f, indent=4)
+			writeJson(categories, outputFile)
 
 			print(f"Categories saved: {outputFile}")
 			return categories
 
+		except QuotaExceededError:
+			raise
+
 		except Exception as e:
 			print(f"Error fetching categories: {e}")
 			return {}
@@ -56,6 +92,8 @@ class YoutubeCollector:
 		if not categoryId and not query:
 			raise ValueError("Provide at least query or categoryId")
 
+		from googleapiclient.errors import HttpError
+
 		try:
 			params = {
 				"part": "snippet",
@@ -79,6 +117,7 @@ class YoutubeCollector:
 			twoDays = (datetime.utcnow() - timedelta(days=7)).isoformat() + "Z"
 			params["publishedAfter"] = twoDays			
 
+			self._spendQuota("search")
 			request = self.youtube.search().list(**params)
 			response = request.execute()
 
@@ -108,22 +147,26 @@ class YoutubeCollector:
 			# save search filters
 			nameNormal = (query or f"cat_{categoryId or 'all'}").replace(" ", "_").replace("/", "_")
 			resultsFile = os.path.join(self.baseDir, f"search_{nameNormal}_{regionCode}_{order}.json")
-			with open(resultsFile, "w", encoding="utf-8") as f:
-				json.dump({
-					"metadata": {
-						"query": query,
-						"categoryId": categoryId,
-						"order": order,
-						"region": regionCode,
-						"maxResults": maxResults
-					},
-					"items": results
-				}, f, indent=4)
+			writeJson({
+				"metadata": {
+					"query": query,
+					"categoryId": categoryId,
+					"order": order,
+					"region": regionCode,
+					"maxResults": maxResults
+				},
+				"items": results
+			}, resultsFile)
 
 			print(f"Search results and  baselines saved at {resultsFile}")
 			return results, videoIds	# videos being tracked
 
-		except googleapiclient.errors.HttpError as e:
+		except QuotaExceededError:
+			raise
+
+		except HttpError as e:
+			if _isQuotaError(e):
+				raise QuotaExceededError(f"Quota exceeded searching videos: {e}")
 			print(f"API error: {e.resp.status} - {e.content.decode('utf-8')}")
 			return [], []
 		except Exception as e:
@@ -143,8 +186,7 @@ class YoutubeCollector:
 		}
 
 		filePath = os.path.join(self.baseDir, "baselines", f"{video['videoId']}.json")
-		with open(filePath, "w", encoding="utf-8") as f:
-			json.dump(baseline, f, indent=4)
+		writeJson(baseline, filePath)
 
 		print(f"Baseline saved at {filePath}")
 
@@ -152,7 +194,10 @@ class YoutubeCollector:
 		"""
 		fetches views, likes, and comment counts to build lifecylce time series
 		saves delta snapshot each run
+		raises QuotaExceededError when the API quota runs out
 		"""
+		from googleapiclient.errors import HttpError
+
 		if not videoIds:
 			return []
 
@@ -169,6 +214,7 @@ class YoutubeCollector:
 			else:
 				idString = videoIds
 
+			self._spendQuota("videos")
 			request = self.youtube.videos().list(
 				part="statistics",
 				id=idString
@@ -191,22 +237,43 @@ class YoutubeCollector:
 			timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 			outputFile = os.path.join(trackingDir, f"stats_delta_{timestamp}.json")
 
-			with open(outputFile, "w", encoding="utf-8") as f:
-				json.dump({"items": results}, f, indent=4)
+			# batches of 50 often land in the same second, add to that poll instead of overwriting it
+			items = results
+			if os.path.exists(outputFile):
+				with open(outputFile, "r", encoding="utf-8") as f:
+					items = json.load(f).get("items", []) + results
+			writeJson({"items": items}, outputFile)
 
 			print(f"Delta stats saved at {outputFile}")
 			return results
 
+		except HttpError as e:
+			if _isQuotaError(e):
+				raise QuotaExceededError(f"Quota exceeded fetching stats: {e}")
+			print(f"Error fetching stats: {e}")
+			return []
+
+		except QuotaExceededError:
+			# from a nested batch, let it reach the caller
+			raise
+
 		except Exception as e:
 			print(f"Error fetching stats: {e}")
 			return []
 
 	def getComments(self, videoId, maxComments=25):
-		# gathers top-level comments at the time gathered no replies
+		"""
+		gathers top-level comments at the time gathered no replies
+		Returns: the comments, [] when the video has none/disabled/removed,
+		None when the fetch failed and is worth retrying
+		raises QuotaExceededError when the API quota runs out
+		"""
+		from googleapiclient.errors import HttpError
 
 		comments = []
 
 		try:
+			self._spendQuota("commentThreads")
 			request = self.youtube.commentThreads().list(
 				part="snippet",
 				videoId=videoId,
@@ -240,11 +307,19 @@ class YoutubeCollector:
 
 			historyFile = os.path.join(trackingDir, f"comments_{videoId}.json")
 
-			# load or start new
-			if os.path.exists(historyFile):
-				with open(historyFile, "r", encoding="utf-8") as f:
-					history = json.load(f)
-			else:
+			# load or start new, compaction may have compressed a cold history
+			history = None
+			existingFile = findData(historyFile)
+			if existingFile is not None:
+				try:
+					history = loadJson(existingFile)
+				except Exception:
+					# truncated by a crash before writes were atomic, keep it aside and start over
+					print(f"Corrupt comment history for {videoId}, moved to {existingFile}.corrupt")
+					os.replace(existingFile, f"{existingFile}.corrupt")
+					existingFile = None
+
+			if history is None:
 				history = {
 					"videoId": videoId,
 					"history": []
@@ -258,21 +333,30 @@ class YoutubeCollector:
 			}
 
 			#only save if differents from last snapshor
-			if history["history"] and history["history"][-1]["commentCount"] == newSnapshot["commentCount"]:
-				print(f"Skipping save for {videoId}, no change in comment count")
-			else:
+			changed = not (history["history"] and history["history"][-1]["commentCount"] == newSnapshot["commentCount"])
+			if changed:
 				history["history"].append(newSnapshot)
+			else:
+				print(f"Skipping save for {videoId}, no change in comment count")
 
-			# Save
-			with open(historyFile, "w", encoding="utf-8") as f:
-				json.dump(history, f, indent=4)
+			# Save, a compressed cold history is left alone until it changes and becomes hot again
+			if changed or existingFile is None or not isCompressed(existingFile):
+				writeJson(history, historyFile)
+				if existingFile is not None and isCompressed(existingFile):
+					os.remove(existingFile)
 
 			print(f"{len(comments)} comments saved(snapshots: {len(history['history'])})")
 
 			return comments
 
-		except googleapiclient.errors.HttpError as e:
+		except QuotaExceededError:
+			# budget ran out before the request, let it reach the caller
+			raise
+
+		except HttpError as e:
 			status = e.resp.status
+			if _isQuotaError(e):
+				raise QuotaExceededError(f"Quota exceeded fetching comments for {videoId}")
 			if status == 403:
 				print(f"Comments disabled or forbidden for {videoId}")
 				return []
@@ -281,8 +365,8 @@ class YoutubeCollector:
 				return []
 			
 			print(f"HTTP error {status} for {videoId}: {e.content.decode('utf-8')}")
-			return []
+			return None
 
 		except Exception as e:
 			print(f"Unexpected error fetching comments for {videoId}: {str(e)}")
-			return []
+			return None
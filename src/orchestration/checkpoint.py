@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, Tuple
+
+
+class CheckpointJournal:
+	"""
+	Append only journal of finished work units (one video's comments, one stats batch) for a run
+	each unit is flushed and fsynced as soon as it completes so a crash, quota error or Ctrl-C
+	loses at most the unit in progress
+	the journal is removed once the run finishes cleanly, a leftover one means the last run
+	died part way and --resume will skip everything it recorded
+	the first line holds the run's start time
+	  maxAge        seconds, an older journal is thrown away instead of resumed (scheduled runs
+	                should not resume something from a previous interval)
+	  resumeUnits   unit prefixes carried over on resume, e.g. ("comments:",) so a later run
+	                still searches and polls stats itself, None carries everything
+	"""
+
+	def __init__(self, path: str, resume: bool = False, maxAge: float | None = None, resumeUnits: Tuple[str, ...] | None = None):
+		self.path = path
+		# unit -> whatever the unit produced that a resumed run still needs (e.g. new video IDs)
+		self.completed: Dict[str, Any] = {}
+		self.startedAt = time.time()
+		self._file = None
+		self._lock = threading.Lock()
+
+		if os.path.exists(path):
+			if resume:
+				startedAt = self._load(resumeUnits)
+				if maxAge is not None and (startedAt is None or time.time() - startedAt > maxAge):
+					print(f"Checkpoint {path} is older than {maxAge}s, starting over")
+					self.completed.clear()
+					os.remove(path)
+				else:
+					self.startedAt = startedAt or self.startedAt
+					print(f"Resuming from checkpoint {path}, {len(self.completed)} work units already done")
+			else:
+				print(f"Found unfinished checkpoint {path}, starting over (use --resume to continue it)")
+				os.remove(path)
+		elif resume:
+			print("Nothing to resume, starting a fresh run")
+
+	def _load(self, resumeUnits: Tuple[str, ...] | None = None) -> float | None:
+		# Returns: when the journaled run started, None for journals without a header
+		startedAt = None
+		with open(self.path, "r", encoding="utf-8") as f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+				except json.JSONDecodeError:
+					# last line cut off mid write, that unit just runs again
+					continue
+				if "startedAt" in entry:
+					startedAt = entry["startedAt"]
+					continue
+				if resumeUnits is not None and not entry["unit"].startswith(resumeUnits):
+					continue
+				self.completed[entry["unit"]] = entry.get("data")
+		return startedAt
+
+	def isDone(self, unit: str) -> bool:
+		return unit in self.completed
+
+	def get(self, unit: str) -> Any:
+		return self.completed.get(unit)
+
+	def markDone(self, unit: str, data: Any = None):
+		with self._lock:
+			if self._file is None:
+				os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+				isNew = not os.path.exists(self.path)
+				self._file = open(self.path, "a", encoding="utf-8")
+				if isNew:
+					self._file.write(json.dumps({"startedAt": self.startedAt}) + "\n")
+			entry = {"unit": unit, "at": datetime.utcnow().isoformat() + "Z"}
+			if data is not None:
+				entry["data"] = data
+			self._file.write(json.dumps(entry) + "\n")
+			self._file.flush()
+			os.fsync(self._file.fileno())
+			self.completed[unit] = data
+
+	def close(self):
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+	def finish(self):
+		# run completed, nothing left to resume
+		self.close()
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		self.completed.clear()
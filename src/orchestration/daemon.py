@@ -0,0 +1,195 @@
+import os
+import time
+import signal
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any
+
+from collectors.apiClient import preloadDiscovery
+from processing.storage import writeJson
+
+
+class ScheduledJob:
+	"""
+	one recurring daemon task and its run history
+	"""
+	def __init__(self, name: str, func: Callable[[], Any], interval: float):
+		self.name = name
+		self.func = func
+		self.interval = interval
+		self.nextRun = time.time()
+		self.lastRun: str | None = None
+		self.lastStatus: str | None = None
+		self.lastDuration: float | None = None
+		self.lastError: str | None = None
+		self.runs = 0
+		self.failures = 0
+
+	def toDict(self) -> Dict[str, Any]:
+		return {
+			"interval": self.interval,
+			"nextRun": datetime.utcfromtimestamp(self.nextRun).isoformat() + "Z",
+			"lastRun": self.lastRun,
+			"lastStatus": self.lastStatus,
+			"lastDuration": self.lastDuration,
+			"lastError": self.lastError,
+			"runs": self.runs,
+			"failures": self.failures
+		}
+
+
+class PipelineDaemon:
+	"""
+	Long running mode for MediaPipeline
+	instead of cron cold starting python every run, one process keeps the VADER analyzer,
+	googleapiclient discovery document and tracked video list loaded and runs collection,
+	comment refresh and sentiment on their own intervals
+	writes a status file every heartbeatInterval, also while a job runs, so it can be health checked from outside
+	"""
+
+	def __init__(self, pipeline, config: Dict[str, Any] | None = None):
+		self.pipeline = pipeline
+		self.config = config or pipeline.config.daemon
+		self.statusFile = self.config["statusFile"]
+		self.startedAt = datetime.utcnow().isoformat() + "Z"
+		self.state = "starting"
+		self.currentJob: str | None = None
+		self._stop = threading.Event()
+		self.jobs: Dict[str, ScheduledJob] = {}
+		self._registerJobs()
+
+	def _registerJobs(self):
+		if self.pipeline.collector:
+			self.addJob("collection", self.collect, self.config["collectionInterval"])
+			self.addJob("commentRefresh", self.refreshComments, self.config["commentInterval"])
+		else:
+			print("No YouTube API key, daemon will only run sentiment")
+
+		if self.pipeline.config.sentiment["enabled"]:
+			self.addJob("sentiment", self.analyzeSentiment, self.config["sentimentInterval"])
+
+		self.addJob("compaction", self.pipeline.compactData, self.config["compactionInterval"])
+
+	def addJob(self, name: str, func: Callable[[], Any], interval: float):
+		job = ScheduledJob(name, func, interval)
+		if not self.config.get("runOnStart", True):
+			job.nextRun = time.time() + interval
+		self.jobs[name] = job
+
+	def collect(self):
+		# new videos + stats + comments for the new ones, same stages as --youtube without sentiment
+		# a job that died part way resumes its comment fetches, but only within one interval,
+		# search and stats always run fresh so every interval gets a complete poll
+		status = self.pipeline.runStages(runYoutube=True, resume=True, maxAge=self.config["collectionInterval"], resumeUnits=("comments:",))
+		failed = [name for name, state in status.items() if state != "done"]
+		if failed:
+			raise RuntimeError(f"stages did not complete: {', '.join(failed)}")
+
+	def refreshComments(self):
+		status = self.pipeline.runStages(updateComments=True, resume=True, maxAge=self.config["commentInterval"], resumeUnits=("comments:",))
+		if any(state != "done" for state in status.values()):
+			raise RuntimeError("comment refresh did not complete")
+
+	def analyzeSentiment(self):
+		# same as the stage DAG, the join picks up the records this run just scored
+		self.pipeline.runSentimentAnalysis()
+		if self.pipeline.config.join["enabled"]:
+			self.pipeline.joinSentimentEngagement()
+
+	def warmUp(self):
+		# load everything once up front so the first job does not pay for it
+		# API clients are per thread and stages run on pool threads, so only the discovery document is preloaded
+		print("Warming up analyzer, API discovery document and video registry")
+		self.pipeline.analyzer
+		if self.pipeline.collector:
+			preloadDiscovery(self.pipeline.collector.apiKey)
+		self.pipeline.loadTrackedVideos()
+
+	def stop(self, *args):
+		if not self._stop.is_set():
+			print("Shutdown requested, stopping current job after its current video or batch")
+		self._stop.set()
+		# running stages check this between units of work, the checkpoint journal keeps what they finished
+		self.pipeline.stopEvent.set()
+
+	def writeStatus(self):
+		status = {
+			"pid": os.getpid(),
+			"state": self.state,
+			"currentJob": self.currentJob,
+			"startedAt": self.startedAt,
+			"heartbeat": datetime.utcnow().isoformat() + "Z",
+			"trackedVideos": len(self.pipeline.loadTrackedVideos()),
+			"jobs": {name: job.toDict() for name, job in self.jobs.items()}
+		}
+
+		os.makedirs(os.path.dirname(self.statusFile) or ".", exist_ok=True)
+		writeJson(status, self.statusFile)
+
+	def _heartbeat(self, done: threading.Event):
+		# keeps the status file fresh while a long job runs
+		while not done.wait(self.config["heartbeatInterval"]):
+			try:
+				self.writeStatus()
+			except Exception as e:
+				print(f"Could not write daemon status: {e}")
+
+	def runJob(self, job: ScheduledJob):
+		print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Daemon job started: {job.name}")
+		start = time.time()
+		job.lastRun = datetime.utcnow().isoformat() + "Z"
+		self.currentJob = job.name
+		done = threading.Event()
+		heartbeat = threading.Thread(target=self._heartbeat, args=(done,), name="heartbeat", daemon=True)
+		heartbeat.start()
+		try:
+			job.func()
+			job.lastStatus = "ok"
+			job.lastError = None
+		except Exception as e:
+			print(f"Daemon job {job.name} failed: {e}")
+			job.lastStatus = "failed"
+			job.lastError = str(e)
+			job.failures += 1
+		finally:
+			done.set()
+			heartbeat.join()
+			self.currentJob = None
+
+		job.runs += 1
+		job.lastDuration = round(time.time() - start, 2)
+		# schedule from when the job was due so runs do not drift later every cycle
+		job.nextRun = max(job.nextRun + job.interval, time.time())
+		print(f"Daemon job {job.name} {job.lastStatus} in {job.lastDuration}s, next run at "
+			f"{(datetime.now() + timedelta(seconds=job.nextRun - time.time())).strftime('%Y-%m-%d %H:%M:%S')}")
+
+	def run(self):
+		if threading.current_thread() is threading.main_thread():
+			signal.signal(signal.SIGINT, self.stop)
+			signal.signal(signal.SIGTERM, self.stop)
+
+		self.pipeline.ensureDirectories()
+		self.warmUp()
+		self.state = "running"
+		self.writeStatus()
+		print(f"Daemon running with jobs: {', '.join(self.jobs) or 'none'}")
+
+		while not self._stop.is_set():
+			if not self.jobs:
+				break
+
+			job = min(self.jobs.values(), key=lambda j: j.nextRun)
+			wait = job.nextRun - time.time()
+			if wait > 0:
+				# wake up for the heartbeat even when nothing is due
+				self._stop.wait(min(wait, self.config["heartbeatInterval"]))
+				if not self._stop.is_set():
+					self.writeStatus()
+				continue
+
+			self.runJob(job)
+			self.writeStatus()
+
+		self.state = "stopped"
+		self.writeStatus()
+		print("Daemon stopped.")
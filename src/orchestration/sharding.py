@@ -0,0 +1,248 @@
+import os
+import bisect
+import hashlib
+import threading
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any
+
+from processing.storage import loadJson, writeJson, findData, isCompressed
+
+
+class HashRing:
+	"""
+	Consistent hash ring over shard numbers
+	each shard owns virtualNodes points on the ring and a video belongs to the next point
+	clockwise from its hash, so going from N to N+1 shards only moves about 1/(N+1) of the videos
+	"""
+
+	def __init__(self, numShards: int, virtualNodes: int = 64):
+		if numShards < 1:
+			raise ValueError("Need at least one shard")
+		self.numShards = numShards
+		points = sorted((self._hash(f"shard{shard}#{v}"), shard) for shard in range(numShards) for v in range(virtualNodes))
+		self._keys = [key for key, _ in points]
+		self._shards = [shard for _, shard in points]
+
+	@staticmethod
+	def _hash(value: str) -> int:
+		return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+	def shardFor(self, videoId: str) -> int:
+		i = bisect.bisect(self._keys, self._hash(videoId)) % len(self._keys)
+		return self._shards[i]
+
+	def partition(self, videoIds: List[str]) -> Dict[int, List[str]]:
+		shards: Dict[int, List[str]] = {shard: [] for shard in range(self.numShards)}
+		for videoId in videoIds:
+			shards[self.shardFor(videoId)].append(videoId)
+		return shards
+
+
+def shardApiKey(config, shardId: int) -> str | None:
+	# shards take keys round robin from YOUTUBE_API_KEYS, falling back to the single YOUTUBE_API_KEY
+	keys = config.sharding["apiKeys"]
+	if keys:
+		return keys[shardId % len(keys)]
+	return config.youtube["apiKey"]
+
+
+def shardBaseDir(config, shardId: int) -> str:
+	return os.path.join(config.sharding["shardDir"], f"shard{shardId}")
+
+
+def newVideosFile(config) -> str:
+	# IDs found by the coordinator's last search, shared with workers through the data directory
+	return os.path.join(config.sharding["shardDir"], "newVideos.json")
+
+
+def runShardWorker(shardId: int, numShards: int, pollStats: bool = True, updateComments: bool = False,
+		resume: bool = False) -> Dict[str, str]:
+	"""
+	One shard of a sharded collection run, in its own process (or on its own machine)
+	works on the tracked videos the ring assigns to this shard, same semantics as the unsharded flags
+	  pollStats (--youtube)         stats for every video in the shard, comments for its new videos only
+	  updateComments                comments for every video in the shard
+	uses this shard's API key and quota budget and writes into the shard's own directory
+	so workers never touch the same file. ShardCoordinator.mergeShards folds it back in
+	"""
+	# imported here, pipeline.py imports this module for --sharded
+	from pipeline import PipelineConfig, MediaPipeline
+
+	config = PipelineConfig()
+	canonicalTracking = os.path.join(config.youtube["baseDir"], "tracked_video_ids.json")
+	config.youtube["apiKey"] = shardApiKey(config, shardId)
+	config.youtube["baseDir"] = shardBaseDir(config, shardId)
+	# the coordinator owns rollups and the join, they are updated once at merge time
+	config.rollups["enabled"] = False
+	config.join["enabled"] = False
+
+	if not config.youtube["apiKey"]:
+		raise SystemExit(f"Shard {shardId}: no API key, set YOUTUBE_API_KEYS or YOUTUBE_API_KEY")
+
+	tracked = loadJson(canonicalTracking) if os.path.exists(canonicalTracking) else []
+	ring = HashRing(numShards, config.sharding["virtualNodes"])
+	mine = [videoId for videoId in tracked if ring.shardFor(videoId) == shardId]
+	print(f"Shard {shardId}/{numShards}: {len(mine)} of {len(tracked)} tracked videos")
+
+	# quotaPerShard is what one key can spend, shards that end up on the same key split it
+	sharing = sum(1 for other in range(numShards) if shardApiKey(config, other) == config.youtube["apiKey"])
+	quotaBudget = config.sharding["quotaPerShard"] // sharing
+	if sharing > 1:
+		print(f"Warning: shard {shardId} shares its API key with {sharing - 1} other shard(s), "
+			f"quota budget cut to {quotaBudget} units. Set one key per shard in YOUTUBE_API_KEYS")
+
+	pipeline = MediaPipeline(config)
+	pipeline.ensureDirectories()
+	pipeline.collector.quotaBudget = quotaBudget
+	pipeline.saveTrackedVideos(mine)
+
+	commentVideoIds = None
+	if not updateComments and pollStats:
+		newIds = set(loadJson(newVideosFile(config))) if os.path.exists(newVideosFile(config)) else set()
+		commentVideoIds = [videoId for videoId in mine if videoId in newIds]
+
+	status = pipeline.runStages(updateComments=updateComments, pollStats=pollStats, resume=resume, commentVideoIds=commentVideoIds)
+	print(f"Shard {shardId} used {pipeline.collector.quotaUsed} quota units")
+	return status
+
+
+def _workerMain(shardId: int, numShards: int, pollStats: bool, updateComments: bool, resume: bool):
+	# process entry point, non zero exit code if any stage did not finish
+	status = runShardWorker(shardId, numShards, pollStats, updateComments, resume)
+	if any(state != "done" for state in status.values()):
+		raise SystemExit(1)
+
+
+class ShardCoordinator:
+	"""
+	Sharded collection across worker processes and API keys
+	  1. discovery (search) runs once here, it is not split by video, google trends runs alongside the workers
+	  2. N workers each poll stats and fetch comments for their slice of the tracked videos
+	  3. per shard stats and comment files are merged into the canonical store
+	workers on other machines sharing the data directory can be started with
+	--shard-worker I --shards N (plus --youtube / --update-comments) and merged afterwards with --merge-shards
+	"""
+
+	def __init__(self, pipeline, numShards: int):
+		self.pipeline = pipeline
+		self.config = pipeline.config
+		self.numShards = numShards
+		self.trackingDir = Path(self.config.youtube["baseDir"]) / "lifecycleTracking"
+
+	def runWorkers(self, pollStats: bool = True, updateComments: bool = False, resume: bool = False) -> Dict[int, int]:
+		# spawn (not fork) so workers start clean, same on macOS and linux
+		ctx = multiprocessing.get_context("spawn")
+		processes = {}
+		for shardId in range(self.numShards):
+			process = ctx.Process(target=_workerMain, args=(shardId, self.numShards, pollStats, updateComments, resume), name=f"shard{shardId}")
+			process.start()
+			processes[shardId] = process
+
+		exitCodes = {}
+		for shardId, process in processes.items():
+			process.join()
+			exitCodes[shardId] = process.exitcode
+			if process.exitcode != 0:
+				print(f"Shard {shardId} exited with code {process.exitcode}, rerun with --resume to continue it")
+		return exitCodes
+
+	@staticmethod
+	def _mergeHistory(canonical: Dict[str, Any], shard: Dict[str, Any]) -> int:
+		# append shard snapshots newer than what we have, same "only when the count changed" rule as getComments
+		history = canonical.setdefault("history", [])
+		added = 0
+		for snapshot in shard.get("history", []):
+			if history and snapshot["fetchedAt"] <= history[-1]["fetchedAt"]:
+				continue
+			if history and history[-1]["commentCount"] == snapshot["commentCount"]:
+				continue
+			history.append(snapshot)
+			added += 1
+		return added
+
+	def mergeShards(self) -> Dict[str, int]:
+		shardDirs = sorted(Path(self.config.sharding["shardDir"]).glob("shard*"))
+		counts = {"shards": len(shardDirs), "statsFiles": 0, "commentFiles": 0}
+		rollups = self.pipeline.rollups
+
+		# stats in poll order across all shards so rollup growth is measured correctly
+		statsFiles = sorted(
+			(f for shardDir in shardDirs for f in (shardDir / "lifecycleTracking").glob("stats_delta_*.json")),
+			key=lambda f: f.name
+		)
+		for filePath in statsFiles:
+			items = loadJson(filePath).get("items", [])
+			target = self.trackingDir / filePath.name
+			if target.exists():
+				# two shards polled in the same second
+				merged = {item["videoId"]: item for item in loadJson(target).get("items", [])}
+				merged.update({item["videoId"]: item for item in items})
+				writeJson({"items": list(merged.values())}, target)
+			else:
+				writeJson({"items": items}, target)
+			if rollups:
+				rollups.updateStats(items)
+			os.remove(filePath)
+			counts["statsFiles"] += 1
+
+		for shardDir in shardDirs:
+			for filePath in (shardDir / "lifecycleTracking").glob("comments_*.json"):
+				shardHistory = loadJson(filePath)
+				target = self.trackingDir / filePath.name
+				# the canonical history may be a compressed cold one, it becomes plain again once it changes
+				existing = findData(target)
+				canonical = loadJson(existing) if existing else {"videoId": shardHistory.get("videoId"), "history": []}
+				if self._mergeHistory(canonical, shardHistory):
+					writeJson(canonical, target)
+					if existing and isCompressed(existing):
+						os.remove(existing)
+				os.remove(filePath)
+				counts["commentFiles"] += 1
+
+		if rollups:
+			rollups.save()
+		print(f"Merged {counts['statsFiles']} stats files and {counts['commentFiles']} comment files from {counts['shards']} shards")
+		return counts
+
+	def _collectTrends(self):
+		try:
+			self.pipeline.collectGoogleTrends()
+		except Exception as e:
+			print(f"Google Trends collection failed: {e}")
+
+	def run(self, runYoutube: bool = False, runSentiment: bool = False, updateComments: bool = False, runTrends: bool = False,
+			resume: bool = False):
+		print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting sharded collection with {self.numShards} workers...")
+		self.pipeline.ensureDirectories()
+
+		trends = None
+		if runTrends:
+			# independent of youtube, runs while the workers do
+			trends = threading.Thread(target=self._collectTrends, name="googleTrends")
+			trends.start()
+
+		if (runYoutube or updateComments) and self.pipeline.collector is None:
+			raise SystemExit("Sharded collection needs an API key, set YOUTUBE_API_KEYS or YOUTUBE_API_KEY")
+
+		if runYoutube:
+			# only the search, stats and comments for new videos are picked up by their shard
+			newIds = self.pipeline.discoverNewVideos()
+			os.makedirs(self.config.sharding["shardDir"], exist_ok=True)
+			writeJson(newIds, newVideosFile(self.config))
+
+		exitCodes = {}
+		if runYoutube or updateComments:
+			exitCodes = self.runWorkers(pollStats=runYoutube, updateComments=updateComments, resume=resume)
+			self.mergeShards()
+
+		if trends:
+			trends.join()
+
+		if runSentiment:
+			self.pipeline.runStages(runSentiment=True)
+
+		failed = [shardId for shardId, code in exitCodes.items() if code != 0]
+		print(f"Sharded collection finished, {self.numShards - len(failed)}/{self.numShards} shards completed.\n")
+		return exitCodes
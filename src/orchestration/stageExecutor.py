@@ -0,0 +1,122 @@
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Any
+
+
+class StageCancelled(Exception):
+	# raised by a stage loop that noticed the stop event
+	pass
+
+
+class Stage:
+	"""
+	one unit of pipeline work and the names of the stages it has to wait on
+	"""
+	def __init__(self, name: str, func: Callable[[], Any], dependsOn: List[str] | None = None):
+		self.name = name
+		self.func = func
+		self.dependsOn = list(dependsOn or [])
+
+
+class StageExecutor:
+	"""
+	Runs pipeline stages as a small DAG
+	stages start as soon as everything they depend on has finished, so independent
+	stages (google trends vs youtube) run side by side on a thread pool
+	if a stage fails anything downstream of it is skipped instead of run on bad data
+	long stages should check stopEvent between units of work, it is set on Ctrl-C
+	"""
+
+	def __init__(self, maxWorkers: int = 4, stopEvent: threading.Event | None = None):
+		self.maxWorkers = maxWorkers
+		self.stopEvent = stopEvent or threading.Event()
+		self.stages: Dict[str, Stage] = {}
+		self.results: Dict[str, Any] = {}
+		self.status: Dict[str, str] = {}
+		self._lock = threading.Lock()
+
+	def addStage(self, name: str, func: Callable[[], Any], dependsOn: List[str] | None = None):
+		if name in self.stages:
+			raise ValueError(f"Stage {name} already added")
+		self.stages[name] = Stage(name, func, dependsOn)
+
+	def _checkGraph(self):
+		# missing dependencies and cycles would leave stages waiting forever so catch them up front
+		for stage in self.stages.values():
+			for dep in stage.dependsOn:
+				if dep not in self.stages:
+					raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+
+		visiting, done = set(), set()
+
+		def visit(name):
+			if name in done:
+				return
+			if name in visiting:
+				raise ValueError(f"Dependency cycle found at stage {name}")
+			visiting.add(name)
+			for dep in self.stages[name].dependsOn:
+				visit(dep)
+			visiting.discard(name)
+			done.add(name)
+
+		for name in self.stages:
+			visit(name)
+
+	def _runStage(self, stage: Stage):
+		print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Stage started: {stage.name}")
+		result = stage.func()
+		print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Stage finished: {stage.name}")
+		return result
+
+	def run(self) -> Dict[str, str]:
+		"""
+		runs every stage once
+		Returns: stage name -> "done", "failed" or "skipped"
+		"""
+		self._checkGraph()
+		pending = dict(self.stages)
+		running = {}
+
+		pool = ThreadPoolExecutor(max_workers=self.maxWorkers)
+		try:
+			while pending or running:
+				# skip anything whose dependency did not finish cleanly
+				for name, stage in list(pending.items()):
+					badDeps = [d for d in stage.dependsOn if self.status.get(d) in ("failed", "skipped")]
+					if badDeps:
+						print(f"Skipping stage {name}, dependency {badDeps[0]} did not complete")
+						self.status[name] = "skipped"
+						del pending[name]
+
+				# start everything that is ready
+				for name, stage in list(pending.items()):
+					if all(self.status.get(d) == "done" for d in stage.dependsOn):
+						running[pool.submit(self._runStage, stage)] = name
+						del pending[name]
+
+				if not running:
+					continue
+
+				finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+				for future in finished:
+					name = running.pop(future)
+					try:
+						result = future.result()
+						with self._lock:
+							self.results[name] = result
+							self.status[name] = "done"
+					except Exception as e:
+						print(f"Stage {name} failed: {e}")
+						with self._lock:
+							self.status[name] = "failed"
+		except KeyboardInterrupt:
+			# Ctrl-C: tell running stages to stop at their next unit of work and do not wait for them
+			print("Interrupted, stopping running stages")
+			self.stopEvent.set()
+			pool.shutdown(wait=False, cancel_futures=True)
+			raise
+		pool.shutdown(wait=True)
+
+		return dict(self.status)
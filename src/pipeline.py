@@ -1,6 +1,8 @@
 import os
 import json
+import queue
 import argparse
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
@@ -9,9 +11,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # CUSTOM CLASSES
+# heavy dependencies (googleapiclient, nltk, pandas, pytrends) are imported by the stage that needs them
+# so a trends only or sentiment only run does not pay for all of them at startup
 from collectors.youtubeCollector import YoutubeCollector
 from processing.sentimentAnalyzer import SentimentAnalyzer
-from collectors.googleTrendsCollector import GoogleTrendsCollector
+from processing.rollups import RollupStore
+from processing.storage import loadJson, writeJson, writeCsv, globData, findData
+from orchestration.stageExecutor import StageExecutor, StageCancelled
+from orchestration.checkpoint import CheckpointJournal
 
 class PipelineConfig:
 	"""
@@ -41,10 +48,66 @@ class PipelineConfig:
 			"outputDir": "data/processed/sentiment"
 		}
 
+		# Per (category, time bucket) aggregates kept up to date after every sentiment batch and stats poll
+		# query them with src/processing/rollups.py
+		self.rollups = {
+			"enabled": True,
+			"path": "data/processed/rollups.json",
+			"granularities": ["hour", "day"]
+		}
+
+		# Sentiment records joined with the nearest prior stats poll of the same video
+		# timeKey: comments aligned on when they were written (publishedAt) or first fetched (fetchedAt)
+		self.join = {
+			"enabled": True,
+			"outputFile": "data/processed/sentimentEngagement.csv",
+			"timeKey": "publishedAt",
+			"tolerance": None	# e.g. "2D" to drop polls too far before the comment
+		}
+
+		# Retention for python src/processing/compaction.py and the daemon compaction job
+		# stats polls: raw for rawDays, then hourly until hourlyDays, then daily
+		# sentiment: all but the newest keepSnapshots merged into one deduplicated file
+		self.retention = {
+			"rawDays": 3,
+			"hourlyDays": 14,
+			"keepSnapshots": 2,
+			"commentDays": 7,
+			"compression": None	# zstd if installed, else gzip
+		}
+
+		# --sharded collection, one worker process per shard each with its own key and quota budget
+		# YOUTUBE_API_KEYS is a comma separated list, shards take keys round robin
+		self.sharding = {
+			"apiKeys": [key.strip() for key in os.getenv("YOUTUBE_API_KEYS", "").split(",") if key.strip()],
+			"shardDir": "data/raw/youtube/shards",
+			"quotaPerShard": 10000,
+			"virtualNodes": 64
+		}
+
+		# Stage execution settings
+		# comment fetching feeds a bounded queue that the sentiment workers drain as data arrives
+		self.pipeline = {
+			"maxWorkers": 4,
+			"sentimentWorkers": 2,
+			"commentQueueSize": 200
+		}
+
+		# --daemon settings, intervals are in seconds
+		self.daemon = {
+			"collectionInterval": 6 * 60 * 60,
+			"commentInterval": 24 * 60 * 60,
+			"sentimentInterval": 6 * 60 * 60,
+			"compactionInterval": 24 * 60 * 60,
+			"heartbeatInterval": 60,
+			"runOnStart": True,
+			"statusFile": "logs/daemonStatus.json"
+		}
+
 	def validate(self) -> bool:
 		# quick check that required settings exist before running
 		if not self.youtube.get("apiKey"):
-			print("Error: YOUTUBE_API_KEY is missing from environment variables.")
+			print("Error: YOUTUBE_API_KEY (or YOUTUBE_API_KEYS for --sharded) is missing from environment variables.")
 			print("Add it to .env file or export it before running.")
 			return False
 		return True
@@ -60,17 +123,47 @@ class MediaPipeline:
 	def __init__(self, config: PipelineConfig):
 		self.config = config
 		self.collector: YoutubeCollector | None = None
-		self.analyzer: SentimentAnalyzer | None = None
+		self._analyzer: SentimentAnalyzer | None = None
+		self._rollups: RollupStore | None = None
+		# set on Ctrl-C, stage loops stop at the next video / stats batch
+		self.stopEvent = threading.Event()
+		# set for the duration of a run, records finished work so --resume can skip it
+		self.journal: CheckpointJournal | None = None
+		# in memory copy of tracked_video_ids.json, reloaded only when the file changes on disk
+		self._trackedVideos: List[str] | None = None
+		self._trackedMtime: float | None = None
 		self._initializeComponents()
 
 	def _initializeComponents(self):
 		# intializes pipeline components and ensures correct API authentication
+		# the API client itself is built on first request (collectors/apiClient.py)
 		if self.config.youtube["apiKey"]:
 			self.collector = YoutubeCollector(self.config.youtube["apiKey"], baseDir=self.config.youtube["baseDir"])
 		else:
 			print("No YouTube API key")
 
-		self.analyzer = SentimentAnalyzer()
+	@property
+	def analyzer(self) -> SentimentAnalyzer:
+		# VADER is only loaded once a stage actually scores text
+		if self._analyzer is None:
+			self._analyzer = SentimentAnalyzer()
+		return self._analyzer
+
+	@analyzer.setter
+	def analyzer(self, value: SentimentAnalyzer | None):
+		self._analyzer = value
+
+	@property
+	def rollups(self) -> RollupStore | None:
+		if not self.config.rollups["enabled"]:
+			return None
+		if self._rollups is None:
+			self._rollups = RollupStore(
+				path=self.config.rollups["path"],
+				baselineDir=os.path.join(self.config.youtube["baseDir"], "baselines"),
+				granularities=self.config.rollups["granularities"]
+			)
+		return self._rollups
 
 	def ensureDirectories(self):
 		for section in [self.config.youtube, self.config.sentiment]:
@@ -85,16 +178,24 @@ class MediaPipeline:
 	def loadTrackedVideos(self) -> List[str]:
 		trackingFile = os.path.join(self.config.youtube["baseDir"], "tracked_video_ids.json")
 
-		if os.path.exists(trackingFile):
+		if not os.path.exists(trackingFile):
+			return []
+
+		mtime = os.path.getmtime(trackingFile)
+		if self._trackedVideos is None or mtime != self._trackedMtime:
 			with open(trackingFile, "r", encoding="utf-8") as f:
-				return json.load(f)
-		return []
+				self._trackedVideos = json.load(f)
+			self._trackedMtime = mtime
+
+		# copy so callers can extend it without touching the cache
+		return list(self._trackedVideos)
 
 	def saveTrackedVideos(self, videoIds: List[str]):
 		trackingFile = os.path.join(self.config.youtube["baseDir"], "tracked_video_ids.json")
 
-		with open(trackingFile, "w", encoding="utf-8") as f:
-			json.dump(videoIds, f, indent=4)
+		writeJson(videoIds, trackingFile)
+		self._trackedVideos = list(videoIds)
+		self._trackedMtime = os.path.getmtime(trackingFile)
 		print(f"Tracked video list updated,  now tracking {len(videoIds)} videos total")
 
 	def collectYoutubeData(self):
@@ -103,6 +204,7 @@ class MediaPipeline:
 		2. Search for newest videos in each category
 		3. Add any genuinely new ones to the tracking list
 		4. Fetch fresh stats for ALL tracked videos (builds time-series data)
+		run() splits these into separate stages, this runs them back to back
 		"""
 		if not self.collector:
 			print("Cannot collect YouTube data → no API key provided.")
@@ -110,7 +212,26 @@ class MediaPipeline:
 
 		print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting YouTube collection...")
 
-		trackingFile = os.path.join(self.config.youtube["baseDir"], "tracked_video_ids.json")
+		for video in self.discoverNewVideos():
+			self.collector.getComments(video)
+
+		self.collectVideoStats()
+
+		print("YouTube data collection finished.\n")
+
+	def discoverNewVideos(self) -> List[str]:
+		"""
+		searches the newest videos in each category and adds unseen ones to the tracking list
+		Returns: the video IDs that were added this run
+		"""
+		if not self.collector:
+			print("Cannot collect YouTube data → no API key provided.")
+			return []
+
+		# searches cost 100 quota units each, a resumed run reuses what the interrupted one found
+		if self.journal and self.journal.isDone("discover"):
+			return self.journal.get("discover") or []
+
 		allTrackedIds = self.loadTrackedVideos()
 
 		# refresh category list
@@ -143,19 +264,157 @@ class MediaPipeline:
 			allTrackedIds.extend(actuallyNew)
 			self.saveTrackedVideos(allTrackedIds)
 
-			for video in actuallyNew:
-				self.collector.getComments(video)
-		# Update stats
-		if allTrackedIds:
-			print(f"Pulling current stats for {len(allTrackedIds)} videos")
-			self.collector.getVideoStats(allTrackedIds)
+		if self.journal:
+			self.journal.markDone("discover", actuallyNew)
+		return actuallyNew
 
-		print("YouTube data collection finished.\n")
+	def collectVideoStats(self):
+		# fresh stats for ALL tracked videos (builds time-series data)
+		if not self.collector:
+			return
+
+		allTrackedIds = self.loadTrackedVideos()
+		if not allTrackedIds:
+			return
 
-	def runSentimentAnalysis(self):
+		print(f"Pulling current stats for {len(allTrackedIds)} videos")
+		try:
+			# 50 per request, each batch is its own checkpointed unit
+			for i in range(0, len(allTrackedIds), 50):
+				if self.stopEvent.is_set():
+					raise StageCancelled("stats polling interrupted")
+				batch = allTrackedIds[i:i + 50]
+				unit = f"stats:{batch[0]}"
+				if self.journal and self.journal.isDone(unit):
+					continue
+
+				stats = self.collector.getVideoStats(batch)
+				if not stats:
+					# failed batch stays out of the journal so a resumed run retries it
+					continue
+				if self.rollups:
+					self.rollups.updateStats(stats)
+				if self.journal:
+					self.journal.markDone(unit)
+		finally:
+			if self.rollups:
+				self.rollups.save()
+
+	def streamComments(self, videoIds: List[str], scoreSentiment: bool = True) -> List[Dict[str, Any]]:
+		"""
+		Producer/consumer between comment collection and sentiment
+		this thread fetches comments and pushes them onto a bounded queue,
+		sentiment workers score each video as soon as it lands instead of waiting for every file
+		Returns: the comment sentiment records
+		"""
+		if not self.collector:
+			print("Cannot fetch comments → no API key provided.")
+			return []
+
+		if not scoreSentiment or not self.analyzer:
+			for vid in videoIds:
+				if self.stopEvent.is_set():
+					raise StageCancelled("comment fetching interrupted")
+				self._fetchComments(vid)
+			return []
+
+		workers = self.config.pipeline["sentimentWorkers"]
+		commentQueue: queue.Queue = queue.Queue(maxsize=self.config.pipeline["commentQueueSize"])
+		results: List[Dict[str, Any]] = []
+		resultsLock = threading.Lock()
+		done = object()
+
+		def consume():
+			while True:
+				item = commentQueue.get()
+				if item is done:
+					return
+				videoId, comments = item
+				try:
+					records = self._scoreComments(videoId, comments)
+				except Exception as e:
+					print(f"Sentiment failed for {videoId}: {e}")
+					continue
+				with resultsLock:
+					results.extend(records)
+
+		consumers = [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+		for t in consumers:
+			t.start()
+
+		try:
+			for vid in videoIds:
+				if self.stopEvent.is_set():
+					raise StageCancelled("comment fetching interrupted")
+				comments = self._fetchComments(vid)
+				if comments:
+					commentQueue.put((vid, comments))
+		finally:
+			# always release the workers even if fetching blew up part way
+			for _ in consumers:
+				commentQueue.put(done)
+			for t in consumers:
+				t.join()
+
+		print(f"Scored {len(results)} comments while collecting")
+		return results
+
+	def _fetchComments(self, videoId: str) -> List[Dict[str, Any]] | None:
+		# one checkpointed unit, videos finished by an interrupted run are read back from disk instead of refetched
+		unit = f"comments:{videoId}"
+		if self.journal and self.journal.isDone(unit):
+			return self._readCommentFile(videoId)
+
+		comments = self.collector.getComments(videoId)
+		if comments is not None and self.journal:
+			self.journal.markDone(unit)
+		return comments
+
+	def _readCommentFile(self, videoId: str) -> List[Dict[str, Any]]:
+		historyFile = findData(os.path.join(self.config.youtube["baseDir"], "lifecycleTracking", f"comments_{videoId}.json"))
+		if historyFile is None:
+			return []
+		try:
+			return self._latestComments(loadJson(historyFile))
+		except Exception:
+			return []
+
+	def _scoreComments(self, videoId: str, comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+		comments = [c for c in comments if c.get("text")]
+		if not comments:
+			return []
+
+		scores = self.analyzer.analyzeTexts([c["text"] for c in comments])
+		return [
+			self._sentimentRecord(videoId, "comment", comment["text"], comment.get("publishedAt"), score)
+			for comment, score in zip(comments, scores)
+		]
+
+	@staticmethod
+	def _sentimentRecord(videoId, source, text, publishedAt, score) -> Dict[str, Any]:
+		return {
+			"videoId": videoId,
+			"source": source,
+			"text": text,
+			"publishedAt": publishedAt,
+			"sentiment": score,
+			"overall": "positive" if score["compound"] > 0.05 else "negative" if score["compound"] < -0.05 else "neutral",
+			"processedAt": datetime.utcnow().isoformat() + "Z"
+		}
+
+	@staticmethod
+	def _latestComments(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+		# getComments keeps a history of snapshots, older files have a flat comment list
+		if data.get("history"):
+			return data["history"][-1].get("comments", [])
+		return data.get("comments", [])
+
+	def runSentimentAnalysis(self, commentResults: List[Dict[str, Any]] | None = None, streamedVideoIds: List[str] | None = None):
 		"""
 		Runs VADER sentiment analysis on multiple text sources
 		Results are saved in one combined JSON file with source tagging.
+		commentResults are comments already scored by streamComments for streamedVideoIds, only the
+		comment files of the other videos are read, so every snapshot covers all comments whatever the entry point
 		"""
 		if not self.analyzer:
 			print("Cannot run sentiment, analyzer not initialized.")
@@ -173,34 +432,29 @@ class MediaPipeline:
 			print(f"Analyzing source: {source}")
 
 			if source == "comments":
+				streamed = set(streamedVideoIds or [])
+				if commentResults is not None:
+					allResults.extend(commentResults)
+					streamed.update(record["videoId"] for record in commentResults)
+
 				# Look in the folder where getComments saves files
 				commentsDir = os.path.join(self.config.youtube["baseDir"], "lifecycleTracking")
 				if not os.path.exists(commentsDir):
 					print("No comments folder yet run collection first")
 					continue
 
-				commentFiles = list(Path(commentsDir).glob("comments_*.json"))
-				print(f"Found {len(commentFiles)} comment files")
+				# cold histories may have been compressed by compaction
+				commentFiles = globData(commentsDir, "comments_*.json")
+				commentFiles = [f for f in commentFiles if f.name[len("comments_"):].split(".json")[0] not in streamed]
+				print(f"Found {len(commentFiles)} comment files" + (f" besides {len(streamed)} scored while collecting" if streamed else ""))
 
 				for filePath in commentFiles:
-					with open(filePath, "r", encoding="utf-8") as f:
-						data = json.load(f)
-					videoId = data.get("videoId")
-					texts = [c["text"] for c in data.get("comments", []) if c.get("text")]
-					if not texts:
+					try:
+						data = loadJson(filePath)
+					except Exception:
+						print(f"Skipping unreadable file {filePath.name}")
 						continue
-
-					scores = self.analyzer.analyzeTexts(texts)
-					for comment, score in zip(data["comments"], scores):
-						allResults.append({
-							"videoId": videoId,
-							"source": "comment",
-							"text": comment["text"],
-							"publishedAt": comment.get("publishedAt"),
-							"sentiment": score,
-							"overall": "positive" if score["compound"] > 0.05 else "negative" if score["compound"] < -0.05 else "neutral",
-							"processedAt": datetime.utcnow().isoformat() + "Z"
-						})
+					allResults.extend(self._scoreComments(data.get("videoId"), self._latestComments(data)))
 
 			elif source in ["titles", "descriptions"]:
 				# titles and descriptions are in baseline files
@@ -222,15 +476,7 @@ class MediaPipeline:
 						continue
 
 					score = self.analyzer.analyzeText(text)
-					allResults.append({
-						"videoId": videoId,
-						"source": source.rstrip("s"),
-						"text": text,
-						"publishedAt": baseline.get("publishedAt"),
-						"sentiment": score,
-						"overall": "positive" if score["compound"] > 0.05 else "negative" if score["compound"] < -0.05 else "neutral",
-						"processedAt": datetime.utcnow().isoformat() + "Z"
-					})
+					allResults.append(self._sentimentRecord(videoId, source.rstrip("s"), text, baseline.get("publishedAt"), score))
 
 			else:
 				print(f"Skipping unknown source: {source}")
@@ -239,28 +485,60 @@ class MediaPipeline:
 		if allResults:
 			timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 			outputFile = os.path.join(processedDir, f"sentiment_multi_source_{timestamp}.json")
-			with open(outputFile, "w", encoding="utf-8") as f:
-				json.dump(allResults, f, indent=4)
+			writeJson(allResults, outputFile)
 			print(f"Saved {len(allResults)} sentiment items to: {outputFile}")
+
+			if self.rollups:
+				added = self.rollups.updateSentiment(allResults)
+				self.rollups.save()
+				print(f"Rollups updated with {added} new sentiment items")
 		else:
 			print("No text found to analyze this run")
 
 		print("Sentiment analysis finished.\n")
 
 
+	def joinSentimentEngagement(self):
+		# appends newly scored sentiment records with their prior engagement snapshot
+		from processing.sentimentJoin import SentimentEngagementJoin
+
+		SentimentEngagementJoin(
+			baseDir=self.config.youtube["baseDir"],
+			sentimentDir=self.config.sentiment["outputDir"],
+			outputFile=self.config.join["outputFile"],
+			timeKey=self.config.join["timeKey"],
+			tolerance=self.config.join["tolerance"]
+		).run()
+
+	def compactData(self):
+		# applies the retention policy to stats polls and sentiment snapshots
+		from processing.compaction import Compactor
+
+		Compactor(
+			baseDir=self.config.youtube["baseDir"],
+			sentimentDir=self.config.sentiment["outputDir"],
+			rawDays=self.config.retention["rawDays"],
+			hourlyDays=self.config.retention["hourlyDays"],
+			keepSnapshots=self.config.retention["keepSnapshots"],
+			commentDays=self.config.retention["commentDays"],
+			compression=self.config.retention["compression"]
+		).run()
+
 	def collectGoogleTrends(self):
 		# collect google trends data and history using googleTrendsCollector.py
+		from collectors.googleTrendsCollector import GoogleTrendsCollector
+
 		cats=self.config.google["cats"]
 		timeframe=self.config.google["timeframe"]
 
 		collector = GoogleTrendsCollector()
 		dfTrends = collector.gatherHistory(cats=cats, timeframe=timeframe)
 		
-		dfTrends.to_csv("data/raw/googleTrendsData.csv")
+		writeCsv(dfTrends, "data/raw/googleTrendsData.csv")
 
 		print("Google Trends data finished collecting.")
 
-	def run(self, runYoutube: bool = False, runSentiment: bool = False, updateComments: bool = False, runTrends=False):
+	def run(self, runYoutube: bool = False, runSentiment: bool = False, updateComments: bool = False, runTrends=False, resume: bool = False):
 		# runs the selected parts of the pipeline, will be all mostly but may need to check individual parts once we start adding
 		if not self.config.validate():
 			print("Pipeline stopped due to invalid configuration.")
@@ -268,26 +546,101 @@ class MediaPipeline:
 
 		self.ensureDirectories()
 
+		if not (runYoutube or runTrends or runSentiment or updateComments):
+			print("No tasks selected. Use --youtube, --update-comments or --all")
+			return
+
+		status = self.runStages(runYoutube, runSentiment, updateComments, runTrends, resume=resume)
+		print("Stage summary: " + ", ".join(f"{name}={state}" for name, state in status.items()))
+
+	def runStages(self, runYoutube: bool = False, runSentiment: bool = False, updateComments: bool = False, runTrends=False, resume: bool = False,
+			pollStats: bool | None = None, maxAge: float | None = None, resumeUnits: tuple | None = None,
+			commentVideoIds: List[str] | None = None) -> Dict[str, str]:
+		"""
+		builds and runs the stage DAG under a checkpoint journal
+		the journal is per combination of tasks so --resume only continues the same kind of run
+		Returns: stage name -> status
+		"""
+		pollStats = runYoutube if pollStats is None else pollStats
+		tasks = [name for name, selected in [("youtube", runYoutube), ("stats", pollStats and not runYoutube), ("comments", updateComments),
+			("newComments", commentVideoIds is not None and not updateComments), ("sentiment", runSentiment), ("trends", runTrends)] if selected]
+		journalFile = os.path.join(self.config.youtube["baseDir"], "checkpoints", f"run_{'-'.join(tasks)}.jsonl")
+		self.journal = CheckpointJournal(journalFile, resume=resume, maxAge=maxAge, resumeUnits=resumeUnits)
+		self.stopEvent.clear()
+
+		try:
+			status = self.buildStages(runYoutube, runSentiment, updateComments, runTrends, pollStats=pollStats, commentVideoIds=commentVideoIds).run()
+		finally:
+			self.journal.close()
+
+		if all(state == "done" for state in status.values()):
+			self.journal.finish()
+		else:
+			print(f"Run did not complete, finished work is recorded in {journalFile}. Rerun with --resume to skip it")
+		self.journal = None
+		return status
+
+	def buildStages(self, runYoutube: bool = False, runSentiment: bool = False, updateComments: bool = False, runTrends=False,
+			pollStats: bool | None = None, commentVideoIds: List[str] | None = None) -> StageExecutor:
+		"""
+		wires the selected steps into a stage DAG
+		  discoverVideos -> collectVideoStats
+		  discoverVideos -> streamComments -> runSentimentAnalysis -> joinSentimentEngagement
+		  collectVideoStats -> joinSentimentEngagement
+		  collectGoogleTrends (independent)
+		stats polling, comment fetching and trends all run at the same time
+		pollStats defaults to runYoutube, sharded workers poll stats without discovering videos
+		commentVideoIds fetches comments for just these videos (a shard's share of new videos)
+		"""
+		executor = StageExecutor(maxWorkers=self.config.pipeline["maxWorkers"], stopEvent=self.stopEvent)
+		discoveryDeps = []
+
+		pollStats = runYoutube if pollStats is None else pollStats
+
 		if runYoutube:
-			self.collectYoutubeData()
-		
+			executor.addStage("discoverVideos", self.discoverNewVideos)
+			discoveryDeps = ["discoverVideos"]
+
+		if pollStats:
+			executor.addStage("collectVideoStats", self.collectVideoStats, dependsOn=discoveryDeps)
+
 		if runTrends:
-			self.collectGoogleTrends()
-
-		if updateComments:
-			print("Running full comment update for all tracked videos.")
-			allTrackedIds = self.loadTrackedVideos()
-			if allTrackedIds:
-				for vid in allTrackedIds:
-					self.collector.getComments(vid)
-			else:
-				print("No tracked videos yet")
+			executor.addStage("collectGoogleTrends", self.collectGoogleTrends)
+
+		streaming = (runYoutube or updateComments or commentVideoIds is not None) and self.collector is not None
+		# videos the comment stage fetched and scored, sentiment reads the files of the rest
+		streamedIds: List[str] = []
+		if streaming:
+			def commentStage():
+				if updateComments:
+					print("Running full comment update for all tracked videos.")
+					videoIds = self.loadTrackedVideos()
+					if not videoIds:
+						print("No tracked videos yet")
+				elif commentVideoIds is not None:
+					videoIds = commentVideoIds
+				else:
+					videoIds = executor.results.get("discoverVideos") or []
+				streamedIds.extend(videoIds)
+				return self.streamComments(videoIds, scoreSentiment=runSentiment)
+
+			executor.addStage("streamComments", commentStage, dependsOn=discoveryDeps)
 
 		if runSentiment:
-			self.runSentimentAnalysis()
+			if streaming:
+				executor.addStage(
+					"runSentimentAnalysis",
+					lambda: self.runSentimentAnalysis(commentResults=executor.results.get("streamComments"), streamedVideoIds=streamedIds),
+					dependsOn=["streamComments"]
+				)
+			else:
+				executor.addStage("runSentimentAnalysis", self.runSentimentAnalysis, dependsOn=discoveryDeps)
 
-		if not (runYoutube or runTrends or runSentiment or updateComments):
-			print("No tasks selected. Use --youtube, --update-comments or --all")
+			if self.config.join["enabled"]:
+				joinDeps = ["runSentimentAnalysis"] + (["collectVideoStats"] if pollStats else [])
+				executor.addStage("joinSentimentEngagement", self.joinSentimentEngagement, dependsOn=joinDeps)
+
+		return executor
 
 
 if __name__ == "__main__":
@@ -296,14 +649,60 @@ if __name__ == "__main__":
 	parser.add_argument("--google-trends", action="store_true", help="Run Google Trends Collection")
 	parser.add_argument("--update-comments", action="store_true", help="Force full comment update for ALL tracked videos")
 	parser.add_argument("--all", action="store_true", help="Run everything, for multi-platform functionality")
+	parser.add_argument("--daemon", action="store_true", help="Stay running and collect on internal intervals instead of cron")
+	parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping videos it already finished")
+	parser.add_argument("--sharded", type=int, metavar="N", help="Collect stats and comments with N worker processes, one API key each")
+	parser.add_argument("--shard-worker", type=int, metavar="I", help="Run only shard I of --shards N (for workers on other machines)")
+	parser.add_argument("--shards", type=int, metavar="N", help="Total shard count for --shard-worker")
+	parser.add_argument("--merge-shards", action="store_true", help="Merge finished shard outputs into the main data directory")
 	args = parser.parse_args()
 
 	config = PipelineConfig()
+	if args.sharded and not config.youtube["apiKey"] and config.sharding["apiKeys"]:
+		# with only YOUTUBE_API_KEYS set the coordinator searches with the first shard's key
+		config.youtube["apiKey"] = config.sharding["apiKeys"][0]
 	pipeline = MediaPipeline(config)
 
-	pipeline.run(
-		runYoutube=args.youtube or args.all,
-		runTrends=args.google_trends or args.all,
-		runSentiment=args.youtube or args.update_comments or args.all,
-		updateComments=args.update_comments or args.all
-	)
+	if args.shard_worker is not None:
+		from orchestration.sharding import runShardWorker
+
+		if not args.shards:
+			parser.error("--shard-worker needs --shards")
+		runShardWorker(
+			args.shard_worker,
+			args.shards,
+			pollStats=args.youtube or args.all,
+			updateComments=args.update_comments or args.all,
+			resume=args.resume
+		)
+	elif args.sharded or args.merge_shards:
+		from orchestration.sharding import ShardCoordinator
+
+		coordinator = ShardCoordinator(pipeline, args.sharded or 1)
+		if args.sharded and (args.youtube or args.update_comments or args.all) and not config.validate():
+			raise SystemExit(1)
+		if args.sharded:
+			coordinator.run(
+				runYoutube=args.youtube or args.all,
+				runSentiment=args.youtube or args.update_comments or args.all,
+				updateComments=args.update_comments or args.all,
+				runTrends=args.google_trends or args.all,
+				resume=args.resume
+			)
+		else:
+			coordinator.mergeShards()
+	elif args.daemon:
+		from orchestration.daemon import PipelineDaemon
+
+		if config.validate():
+			PipelineDaemon(pipeline).run()
+		else:
+			print("Daemon not started due to invalid configuration.")
+	else:
+		pipeline.run(
+			runYoutube=args.youtube or args.all,
+			runTrends=args.google_trends or args.all,
+			runSentiment=args.youtube or args.update_comments or args.all,
+			updateComments=args.update_comments or args.all,
+			resume=args.resume
+		)
@@ -1,9 +1,12 @@
 import json
 from pathlib import Path
-import googleapiclient.discovery
-from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from collectors.apiClient import getYoutubeClient
+from processing.storage import writeJson
 
 class Backfiller:
 	# did not originally save the category by mistake so have to backfill
@@ -11,10 +14,12 @@ class Backfiller:
 	def __init__(self):
 		load_dotenv()
 		self.key = os.getenv("YOUTUBE_API_KEY")
-		self.youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=self.key)
+		self.youtube = getYoutubeClient(self.key)
 		self.baseDir = Path("data/raw/youtube/baselines")
 
 	def getCatIds(self, videoId):
+		from googleapiclient.errors import HttpError
+
 		try:
 			request = self.youtube.videos().list(part="snippet", id=videoId)
 			response = request.execute()
@@ -50,8 +55,7 @@ class Backfiller:
 				return False
 
 			data["categoryId"] = catId
-			with open(filePath, "w", encoding="utf-8") as f:
-				json.dump(data, f, indent=4)
+			writeJson(data, filePath)
 
 			print(f"{videoId} has been backfilled with {catId}")
 			return True
@@ -0,0 +1,13 @@
+# youtube category id -> category name for the categories we collect
+# baselines only store the id (see backfillCategory.py)
+CATEGORY_NAMES = {
+	"24": "Entertainment",
+	"10": "Music",
+	"20": "Gaming",
+	"27": "Education",
+	"26": "Howto & Style"
+}
+
+
+def categoryName(catId) -> str:
+	return CATEGORY_NAMES.get(str(catId) if catId is not None else None, "Unknown")
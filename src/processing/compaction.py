@@ -0,0 +1,206 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from processing.storage import loadJson, writeJson, globData, defaultCompression, compressedSuffix, recordKey
+
+STAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+class Compactor:
+	"""
+	Tiered retention for lifecycleTracking stats polls, comment histories and sentiment snapshots
+	  stats polls   newer than rawDays stay as they are
+	                rawDays..hourlyDays old keep the last poll per video per hour
+	                older than hourlyDays keep the last poll per video per day
+	                compacted polls are stored one compressed file per day (stats_compact_YYYYMMDD)
+	  comments      histories with no new snapshot for commentDays are compressed in place,
+	                getComments keeps a cold file compressed until its comments change again
+	  sentiment     every snapshot but the newest keepSnapshots is merged into one
+	                deduplicated, compressed sentiment_merged file
+	storage.py reads both layouts so longCsv, rollups, sentiment etc. do not care what has been compacted
+	safe to run repeatedly, already compacted days are just downsampled further as they age
+	"""
+
+	def __init__(self, baseDir="data/raw/youtube", sentimentDir="data/processed/sentiment",
+			rawDays=3, hourlyDays=14, keepSnapshots=2, commentDays=7, compression=None, dryRun=False):
+		self.statsDir = Path(baseDir) / "lifecycleTracking"
+		self.sentimentDir = Path(sentimentDir)
+		self.rawDays = rawDays
+		self.hourlyDays = hourlyDays
+		self.keepSnapshots = keepSnapshots
+		self.commentDays = commentDays
+		self.compression = compression or defaultCompression()
+		self.suffix = compressedSuffix(self.compression)
+		self.dryRun = dryRun
+
+	def _resolutionFor(self, stamp: str, now: datetime) -> str:
+		age = now - datetime.strptime(stamp, STAMP_FORMAT)
+		if age < timedelta(days=self.rawDays):
+			return "raw"
+		if age < timedelta(days=self.hourlyDays):
+			return "hourly"
+		return "daily"
+
+	@staticmethod
+	def _downsample(polls: List[Dict[str, Any]], resolution: str) -> List[Dict[str, Any]]:
+		# keep the last poll of each video in each hour/day, polls grouped back under their original stamp
+		keyLength = 11 if resolution == "hourly" else 8	# YYYYMMDD_HH / YYYYMMDD
+		latest: Dict[tuple, tuple] = {}
+		for poll in sorted(polls, key=lambda p: p["polledAt"]):
+			for item in poll["items"]:
+				latest[(item["videoId"], poll["polledAt"][:keyLength])] = (poll["polledAt"], item)
+
+		grouped: Dict[str, List[Dict[str, Any]]] = {}
+		for stamp, item in latest.values():
+			grouped.setdefault(stamp, []).append(item)
+		return [{"polledAt": stamp, "items": items} for stamp, items in sorted(grouped.items())]
+
+	def compactStats(self, now: datetime | None = None) -> Dict[str, int]:
+		now = now or datetime.utcnow()
+		# day -> polls plus the files they came from
+		days: Dict[str, Dict[str, Any]] = {}
+
+		for filePath in globData(self.statsDir, "stats_delta_*.json"):
+			stamp = filePath.name.split("stats_delta_")[1][:15]
+			if self._resolutionFor(stamp, now) == "raw":
+				continue
+			day = days.setdefault(stamp[:8], {"polls": [], "files": []})
+			day["polls"].append({"polledAt": stamp, "items": loadJson(filePath).get("items", [])})
+			day["files"].append(filePath)
+
+		for filePath in globData(self.statsDir, "stats_compact_*.json"):
+			dayKey = filePath.name.split("stats_compact_")[1][:8]
+			data = loadJson(filePath)
+			resolution = self._resolutionFor(f"{dayKey}_235959", now)
+			if dayKey not in days and data.get("resolution") == resolution and filePath.name.endswith(self.suffix):
+				continue	# nothing new and already at the right resolution
+			day = days.setdefault(dayKey, {"polls": [], "files": []})
+			day["polls"].extend(data.get("polls", []))
+			day["files"].append(filePath)
+
+		counts = {"days": 0, "filesRemoved": 0, "itemsBefore": 0, "itemsAfter": 0}
+		for dayKey, day in sorted(days.items()):
+			# whole days share one resolution, decided by the end of the day so a day is never split
+			resolution = self._resolutionFor(f"{dayKey}_235959", now)
+			if resolution == "raw":
+				resolution = "hourly"
+			polls = self._downsample(day["polls"], resolution)
+			before = sum(len(p["items"]) for p in day["polls"])
+			after = sum(len(p["items"]) for p in polls)
+			outputFile = self.statsDir / f"stats_compact_{dayKey}.json{self.suffix}"
+
+			print(f"stats {dayKey}: {len(day['files'])} files, {before} -> {after} items ({resolution})")
+			counts["days"] += 1
+			counts["itemsBefore"] += before
+			counts["itemsAfter"] += after
+			if self.dryRun:
+				continue
+
+			writeJson({"day": dayKey, "resolution": resolution, "compactedAt": now.isoformat() + "Z", "polls": polls},
+				outputFile, compression=self.compression)
+			for filePath in day["files"]:
+				if filePath != outputFile:
+					os.remove(filePath)
+					counts["filesRemoved"] += 1
+
+		return counts
+
+	def compactComments(self, now: datetime | None = None) -> Dict[str, int]:
+		now = now or datetime.utcnow()
+		counts = {"files": 0, "bytesBefore": 0, "bytesAfter": 0}
+
+		# plain files only, compressed ones are already cold
+		for filePath in sorted(self.statsDir.glob("comments_*.json")):
+			try:
+				data = loadJson(filePath)
+				lastFetched = datetime.strptime(data["history"][-1]["fetchedAt"], STAMP_FORMAT)
+			except Exception as e:
+				print(f"comments: skipping {filePath.name}: {e}")
+				continue
+			if now - lastFetched < timedelta(days=self.commentDays):
+				continue
+
+			counts["files"] += 1
+			counts["bytesBefore"] += filePath.stat().st_size
+			if self.dryRun:
+				continue
+
+			outputFile = Path(f"{filePath}{self.suffix}")
+			writeJson(data, outputFile, compression=self.compression)
+			counts["bytesAfter"] += outputFile.stat().st_size
+			os.remove(filePath)
+
+		if self.dryRun:
+			print(f"comments: {counts['files']} cold histories, {counts['bytesBefore']} bytes to compress")
+		else:
+			print(f"comments: {counts['files']} cold histories, {counts['bytesBefore']} -> {counts['bytesAfter']} bytes")
+		return counts
+
+	def compactSentiment(self) -> Dict[str, int]:
+		snapshots = globData(self.sentimentDir, "sentiment_multi_source_*.json")
+		superseded = snapshots[:-self.keepSnapshots] if self.keepSnapshots else snapshots
+		counts = {"snapshotsMerged": len(superseded), "recordsBefore": 0, "recordsAfter": 0}
+		if not superseded:
+			print("sentiment: nothing to merge")
+			return counts
+
+		mergedFiles = globData(self.sentimentDir, "sentiment_merged.json")
+		merged: Dict[str, Dict[str, Any]] = {}
+		# oldest first so a later score of the same text replaces the earlier one
+		for filePath in mergedFiles + superseded:
+			for record in loadJson(filePath):
+				counts["recordsBefore"] += 1
+				merged[recordKey(record)] = record
+		counts["recordsAfter"] = len(merged)
+
+		print(f"sentiment: {len(superseded)} snapshots, {counts['recordsBefore']} -> {counts['recordsAfter']} records")
+		if self.dryRun:
+			return counts
+
+		outputFile = self.sentimentDir / f"sentiment_merged.json{self.suffix}"
+		writeJson(list(merged.values()), outputFile, compression=self.compression)
+		for filePath in mergedFiles + superseded:
+			if filePath != outputFile:
+				os.remove(filePath)
+		return counts
+
+	def run(self):
+		print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting compaction ({self.compression}{', dry run' if self.dryRun else ''})...")
+		stats = self.compactStats()
+		comments = self.compactComments()
+		sentiment = self.compactSentiment()
+		print("Compaction finished.\n")
+		return {"stats": stats, "comments": comments, "sentiment": sentiment}
+
+
+if __name__ == "__main__":
+	# defaults come from PipelineConfig.retention so the CLI and the daemon apply the same policy
+	from pipeline import PipelineConfig
+
+	config = PipelineConfig()
+	retention = config.retention
+
+	parser = argparse.ArgumentParser(description="Compact old stats polls, comment histories and sentiment snapshots")
+	parser.add_argument("--raw-days", type=int, default=retention["rawDays"], help="Keep every stats poll newer than this")
+	parser.add_argument("--hourly-days", type=int, default=retention["hourlyDays"], help="Keep hourly stats until this age, daily after")
+	parser.add_argument("--keep-snapshots", type=int, default=retention["keepSnapshots"], help="Newest sentiment snapshots left unmerged")
+	parser.add_argument("--comment-days", type=int, default=retention["commentDays"], help="Compress comment histories with no new snapshot for this long")
+	parser.add_argument("--compression", choices=["zstd", "gzip"], default=retention["compression"], help="Defaults to zstd if zstandard is installed")
+	parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching files")
+	args = parser.parse_args()
+
+	Compactor(
+		baseDir=config.youtube["baseDir"],
+		sentimentDir=config.sentiment["outputDir"],
+		rawDays=args.raw_days,
+		hourlyDays=args.hourly_days,
+		keepSnapshots=args.keep_snapshots,
+		commentDays=args.comment_days,
+		compression=args.compression,
+		dryRun=args.dry_run
+	).run()
@@ -1,8 +1,13 @@
 import os
+import sys
 import json
 import pandas as pd
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from processing.categories import categoryName
+from processing.storage import loadStatsPolls, writeCsv
+
 class jsonToLongCsv:
 	def __init__(self, baseDir="data/raw/youtube", outputDir="data/processed", outputFile="statsLong.csv"):
 		self.baseDir = Path(baseDir)
@@ -15,15 +20,6 @@ class jsonToLongCsv:
 	def loadBaselines(self) -> pd.DataFrame:
 		rows: List[Dict] = []
 
-		#UPDATE: category id -> category Name
-		catMap = {
-			"24": "Entertainment",
-			"10": "Music",
-			"20": "Gaming",
-			"27": "Education",
-			"26": "Howto & Style"
-		}
-
 		for file in self.baselineDir.glob("*.json"):
 			try:
 				with open(file, "r", encoding="utf-8") as f:
@@ -31,8 +27,7 @@ class jsonToLongCsv:
 
 				#UPDATE: category id -> category name
 				# missed this first time
-				catId = data.get("categoryId")
-				catName = catMap.get(catId, "Unknown")
+				catName = categoryName(data.get("categoryId"))
 				rows.append({
 					"videoId": data.get("videoId"),
 					"title": data.get("title"),
@@ -51,23 +46,17 @@ class jsonToLongCsv:
 
 	def loadStats(self) -> pd.DataFrame:
 		stats: List[Dict] = []
-		for file in self.statsDir.glob("stats_delta_*.json"):
-			try:
-				timeStr = file.stem.split("stats_delta_")[1]
-				timestamp = pd.to_datetime(timeStr, format="%Y%m%d_%H%M%S")
-				with open(file, "r", encoding="utf-8") as f:
-					data = json.load(f)
-				
-				for item in data.get("items", []):
-					stats.append({
-						"videoId": item["videoId"],
-						"pollTimestamp": timestamp,
-						"viewCount": item["viewCount"],
-						"likeCount": item["likeCount"],
-						"commentCount": item["commentCount"]
-					})
-			except Exception as e:
-				print(f"Error reading stats from {file.name}: {e}")
+		# raw stats_delta files and compacted days (see compaction.py) come back the same way
+		for timeStr, items in loadStatsPolls(self.statsDir):
+			timestamp = pd.to_datetime(timeStr, format="%Y%m%d_%H%M%S")
+			for item in items:
+				stats.append({
+					"videoId": item["videoId"],
+					"pollTimestamp": timestamp,
+					"viewCount": item["viewCount"],
+					"likeCount": item["likeCount"],
+					"commentCount": item["commentCount"]
+				})
 
 		df = pd.DataFrame(stats)
 		print(f"Loaded {len(df)} stats rows")
@@ -81,7 +70,7 @@ class jsonToLongCsv:
 		return dfFinal
 
 	def save(self, df: pd.DataFrame):
-		df.to_csv(self.outputPath, index=False, encoding="utf-8")
+		writeCsv(df, self.outputPath, index=False)
 		print(f"Saved at {self.outputPath}")
 
 	def run(self):
@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Iterable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from processing.categories import categoryName
+from processing.storage import globData, loadJson, loadStatsPolls, recordKey, writeJson
+
+GRANULARITIES = {"hour": 13, "day": 10}	# length of the ISO timestamp prefix for each bucket
+
+
+def timeBucket(timestamp: str | None, granularity: str) -> str | None:
+	"""
+	turns any timestamp we store into a bucket key by slicing, no datetime parsing
+	  ISO (publishedAt, pollTimestamp)  2026-02-11T18:20:06Z -> 2026-02-11T18 / 2026-02-11
+	  file stamp (fetchedAt)            20260211_182006      -> same
+	"""
+	if not timestamp:
+		return None
+	if len(timestamp) == 15 and timestamp[8] == "_":
+		timestamp = f"{timestamp[0:4]}-{timestamp[4:6]}-{timestamp[6:8]}T{timestamp[9:11]}"
+	return timestamp.replace(" ", "T")[:GRANULARITIES[granularity]]
+
+
+class RollupStore:
+	"""
+	Materialized per (category, time bucket) aggregates of sentiment and engagement
+	updated incrementally from each sentiment batch and stats poll so questions like
+	"mean compound per category per hour" or "view growth per category per day" are
+	answered from memory instead of reloading every sentiment file and statsLong.csv
+
+	only sums and counts are stored, means and spreads are derived at query time
+	sentiment files repeat the whole corpus each run so records are deduplicated by a short hash,
+	the hashes live in an append only <path>.seen file that queries never load, rollups.json
+	records how many bytes of it belong to the saved aggregates
+	"""
+
+	def __init__(self, path="data/processed/rollups.json", baselineDir="data/raw/youtube/baselines", granularities=("hour", "day")):
+		self.path = path
+		self.seenPath = f"{path}.seen"
+		self.baselineDir = Path(baselineDir)
+		self.granularities = list(granularities)
+		self._lock = threading.Lock()
+		self._categories: Dict[str, str] = {}
+		self.load()
+
+	# storage
+
+	def load(self):
+		data = {}
+		if os.path.exists(self.path):
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+
+		self.sentiment: Dict[str, Dict[str, Dict[str, float]]] = data.get("sentiment", {g: {} for g in self.granularities})
+		self.engagement: Dict[str, Dict[str, Dict[str, float]]] = data.get("engagement", {g: {} for g in self.granularities})
+		self.lastStats: Dict[str, Dict[str, Any]] = data.get("lastStats", {})
+		self.seenBytes: int = data.get("seenBytes", 0)
+		self._seen: set | None = None
+		self._newKeys: List[str] = []
+		if "seen" in data:
+			# older rollups.json kept the hashes inline, they move to the .seen file on the next save
+			self._seen = set(data["seen"])
+			self._newKeys = sorted(self._seen)
+			self.seenBytes = 0
+		for g in self.granularities:
+			self.sentiment.setdefault(g, {})
+			self.engagement.setdefault(g, {})
+
+	def _seenKeys(self) -> set:
+		# only loaded once sentiment is added, bytes past seenBytes are from a save that never finished
+		if self._seen is None:
+			self._seen = set()
+			if os.path.exists(self.seenPath):
+				with open(self.seenPath, "rb") as f:
+					self._seen.update(f.read(self.seenBytes).decode("ascii").split())
+		return self._seen
+
+	def save(self):
+		os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+		with self._lock:
+			if self._newKeys or self.seenBytes == 0:
+				# new hashes first, rollups.json then points past them so a crash in between is rolled back
+				with open(self.seenPath, "ab") as f:
+					f.truncate(self.seenBytes)
+					f.write("".join(f"{key}\n" for key in self._newKeys).encode("ascii"))
+					f.flush()
+					os.fsync(f.fileno())
+					self.seenBytes = f.tell()
+			data = {
+				"updatedAt": datetime.utcnow().isoformat() + "Z",
+				"sentiment": self.sentiment,
+				"engagement": self.engagement,
+				"lastStats": self.lastStats,
+				"seenBytes": self.seenBytes
+			}
+			writeJson(data, self.path, indent=None)
+			self._newKeys = []
+
+	def categoryFor(self, videoId: str) -> str:
+		# baselines are read once per video and kept in memory
+		if videoId not in self._categories:
+			catId = None
+			baselineFile = self.baselineDir / f"{videoId}.json"
+			if baselineFile.exists():
+				try:
+					with open(baselineFile, "r", encoding="utf-8") as f:
+						catId = json.load(f).get("categoryId")
+				except Exception as e:
+					print(f"Error loading baseline {baselineFile.name}: {e}")
+			self._categories[videoId] = categoryName(catId)
+		return self._categories[videoId]
+
+	# incremental updates
+
+	def updateSentiment(self, records: Iterable[Dict[str, Any]]) -> int:
+		"""
+		adds a batch of sentiment records (runSentimentAnalysis output)
+		Returns: how many records were new
+		"""
+		added = 0
+		with self._lock:
+			seen = self._seenKeys()
+			for record in records:
+				key = recordKey(record)
+				if key in seen:
+					continue
+				seen.add(key)
+				self._newKeys.append(key)
+				added += 1
+
+				score = record.get("sentiment") or {}
+				compound = score.get("compound", 0.0)
+				category = self.categoryFor(record.get("videoId"))
+				for g in self.granularities:
+					bucket = timeBucket(record.get("publishedAt") or record.get("processedAt"), g)
+					if not bucket:
+						continue
+					agg = self.sentiment[g].setdefault(f"{category}|{bucket}|{record.get('source')}", {
+						"count": 0, "compoundSum": 0.0, "compoundSqSum": 0.0, "posSum": 0.0, "neuSum": 0.0, "negSum": 0.0,
+						"positive": 0, "neutral": 0, "negative": 0
+					})
+					agg["count"] += 1
+					agg["compoundSum"] += compound
+					agg["compoundSqSum"] += compound * compound
+					agg["posSum"] += score.get("pos", 0.0)
+					agg["neuSum"] += score.get("neu", 0.0)
+					agg["negSum"] += score.get("neg", 0.0)
+					overall = record.get("overall") or ("positive" if compound > 0.05 else "negative" if compound < -0.05 else "neutral")
+					agg[overall] = agg.get(overall, 0) + 1
+		return added
+
+	def updateStats(self, items: Iterable[Dict[str, Any]]) -> int:
+		"""
+		adds one stats poll (getVideoStats output)
+		growth is measured against the previous poll of the same video
+		Returns: how many items were newer than what we already had
+		"""
+		added = 0
+		with self._lock:
+			for item in items:
+				videoId = item.get("videoId")
+				polledAt = item.get("pollTimestamp")
+				if not videoId or not polledAt:
+					continue
+
+				last = self.lastStats.get(videoId)
+				if last and last["pollTimestamp"] >= polledAt:
+					continue
+				added += 1
+
+				category = self.categoryFor(videoId)
+				for g in self.granularities:
+					agg = self.engagement[g].setdefault(f"{category}|{timeBucket(polledAt, g)}", {
+						"polls": 0, "viewSum": 0, "likeSum": 0, "commentSum": 0,
+						"growthPolls": 0, "viewGrowth": 0, "likeGrowth": 0, "commentGrowth": 0
+					})
+					agg["polls"] += 1
+					agg["viewSum"] += item.get("viewCount", 0)
+					agg["likeSum"] += item.get("likeCount", 0)
+					agg["commentSum"] += item.get("commentCount", 0)
+					if last:
+						agg["growthPolls"] += 1
+						agg["viewGrowth"] += item.get("viewCount", 0) - last["viewCount"]
+						agg["likeGrowth"] += item.get("likeCount", 0) - last["likeCount"]
+						agg["commentGrowth"] += item.get("commentCount", 0) - last["commentCount"]
+
+				self.lastStats[videoId] = {
+					"pollTimestamp": polledAt,
+					"viewCount": item.get("viewCount", 0),
+					"likeCount": item.get("likeCount", 0),
+					"commentCount": item.get("commentCount", 0)
+				}
+		return added
+
+	# queries
+
+	def query(self, metric: str = "sentiment", granularity: str = "day", category: str | None = None,
+			start: str | None = None, end: str | None = None, source: str | None = None) -> List[Dict[str, Any]]:
+		"""
+		Returns: one row per (category, bucket) sorted by bucket, with derived means
+		  metric      "sentiment" or "engagement"
+		  start/end   inclusive bucket bounds, any ISO prefix works ("2026-02-11", "2026-02-11T18")
+		  source      sentiment only, "comment", "title" or "description" (default all combined)
+		"""
+		if metric not in ("sentiment", "engagement"):
+			raise ValueError(f"Unknown metric {metric}")
+		table = getattr(self, metric).get(granularity)
+		if table is None:
+			raise ValueError(f"Granularity {granularity} is not being maintained")
+
+		merged: Dict[tuple, Dict[str, float]] = {}
+		with self._lock:
+			for key, agg in table.items():
+				parts = key.split("|")
+				cat, bucket = parts[0], parts[1]
+				if category and cat != category:
+					continue
+				if start and bucket < start[:len(bucket)]:
+					continue
+				if end and bucket > end[:len(bucket)]:
+					continue
+				if source and parts[2] != source:
+					continue
+
+				row = merged.setdefault((cat, bucket), dict.fromkeys(agg, 0))
+				for field, value in agg.items():
+					row[field] = row.get(field, 0) + value
+
+		rows = []
+		for (cat, bucket), agg in sorted(merged.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+			row = {"category": cat, "bucket": bucket, **agg}
+			if metric == "sentiment":
+				n = agg["count"]
+				mean = agg["compoundSum"] / n if n else 0.0
+				row["compoundMean"] = mean
+				row["compoundStd"] = max(agg["compoundSqSum"] / n - mean * mean, 0.0) ** 0.5 if n else 0.0
+				row["posMean"] = agg["posSum"] / n if n else 0.0
+				row["neuMean"] = agg["neuSum"] / n if n else 0.0
+				row["negMean"] = agg["negSum"] / n if n else 0.0
+			else:
+				polls, growthPolls = agg["polls"], agg["growthPolls"]
+				row["viewMean"] = agg["viewSum"] / polls if polls else 0.0
+				row["likeMean"] = agg["likeSum"] / polls if polls else 0.0
+				row["viewGrowthMean"] = agg["viewGrowth"] / growthPolls if growthPolls else 0.0
+				row["likeGrowthMean"] = agg["likeGrowth"] / growthPolls if growthPolls else 0.0
+			rows.append(row)
+		return rows
+
+	# backfill
+
+	def rebuild(self, sentimentDir="data/processed/sentiment", statsDir="data/raw/youtube/lifecycleTracking"):
+		# builds the rollups from scratch out of every file on disk, only needed once or after config changes
+		self.sentiment = {g: {} for g in self.granularities}
+		self.engagement = {g: {} for g in self.granularities}
+		self.lastStats = {}
+		self._seen = set()
+		self._newKeys = []
+		self.seenBytes = 0
+
+		# stats have to go in poll order for growth to be correct
+		polls = loadStatsPolls(statsDir)
+		for _, items in polls:
+			self.updateStats(items)
+		print(f"Rolled up {len(polls)} stats polls")
+
+		# merged history from compaction sorts ahead of the snapshots
+		sentimentFiles = globData(sentimentDir, "sentiment_merged.json") + globData(sentimentDir, "sentiment_multi_source_*.json")
+		for filePath in sentimentFiles:
+			added = self.updateSentiment(loadJson(filePath))
+			print(f"{filePath.name}: {added} new records")
+
+		self.save()
+		print(f"Rollups saved at {self.path}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Sentiment and engagement rollups")
+	parser.add_argument("--rebuild", action="store_true", help="Rebuild rollups from every sentiment and stats file")
+	parser.add_argument("--metric", default="sentiment", choices=["sentiment", "engagement"])
+	parser.add_argument("--granularity", default="day", choices=list(GRANULARITIES))
+	parser.add_argument("--category", help="Only this category, e.g. Music")
+	parser.add_argument("--start", help="First bucket, e.g. 2026-02-11")
+	parser.add_argument("--end", help="Last bucket")
+	args = parser.parse_args()
+
+	store = RollupStore()
+	if args.rebuild:
+		store.rebuild()
+
+	for row in store.query(args.metric, args.granularity, args.category, args.start, args.end):
+		if args.metric == "sentiment":
+			print(f"{row['bucket']:<14} {row['category']:<14} n={row['count']:<6} compound={row['compoundMean']:+.3f} "
+				f"pos/neu/neg={row['positive']}/{row['neutral']}/{row['negative']}")
+		else:
+			print(f"{row['bucket']:<14} {row['category']:<14} polls={row['polls']:<6} views={row['viewMean']:.0f} "
+				f"viewGrowth={row['viewGrowthMean']:.1f}")
@@ -1,6 +1,3 @@
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-
 class SentimentAnalyzer:
 	"""
 	sentiment analyzer using VADER for all text based data obtained from our platforms
@@ -8,6 +5,8 @@ class SentimentAnalyzer:
 	"""
 	
 	def __init__(self):
+		# nltk is slow to import and the lexicon load is not free, only pay for it when sentiment actually runs
+		from nltk.sentiment.vader import SentimentIntensityAnalyzer
 		self.analyzer = SentimentIntensityAnalyzer()
 
 	def analyzeText(self, text):
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import argparse
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from processing.storage import globData, loadJson, loadStatsPolls, recordKey, writeJson
+
+
+class SentimentEngagementJoin:
+	"""
+	Time aligned join of sentiment records with engagement
+	each sentiment record gets the nearest stats poll at or before its event time for the same video,
+	done as one vectorized merge_asof over sorted per-video time indexes instead of a nested loop
+
+	event time for comments is publishedAt (when it was written) or fetchedAt (first snapshot
+	it showed up in, from the comment history files), titles and descriptions use processedAt
+
+	output is appended one sentiment file at a time, a state file remembers which files and
+	records were already joined so reruns only process what is new, plus the size of the csv
+	they ended at so rows from an append that crashed before the state was saved are cut off again
+	"""
+
+	def __init__(self, baseDir="data/raw/youtube", sentimentDir="data/processed/sentiment",
+			outputFile="data/processed/sentimentEngagement.csv", timeKey="publishedAt", tolerance=None):
+		if timeKey not in ("publishedAt", "fetchedAt"):
+			raise ValueError(f"timeKey must be publishedAt or fetchedAt, got {timeKey}")
+		self.baseDir = Path(baseDir)
+		self.statsDir = self.baseDir / "lifecycleTracking"
+		self.sentimentDir = Path(sentimentDir)
+		self.outputFile = Path(outputFile)
+		self.stateFile = Path(str(outputFile) + ".state.json")
+		self.timeKey = timeKey
+		# e.g. "2D", polls older than this relative to the event are not attached
+		self.tolerance = pd.Timedelta(tolerance) if tolerance else None
+		self.statsIndex: pd.DataFrame | None = None
+		self.commentIndex: pd.DataFrame | None = None
+
+	# indexes
+
+	def buildStatsIndex(self) -> pd.DataFrame:
+		rows = []
+		for stamp, items in loadStatsPolls(self.statsDir):
+			for item in items:
+				rows.append((item["videoId"], stamp, item["viewCount"], item["likeCount"], item["commentCount"]))
+
+		df = pd.DataFrame(rows, columns=["videoId", "pollTimestamp", "viewCount", "likeCount", "commentCount"])
+		df["pollTimestamp"] = pd.to_datetime(df["pollTimestamp"], format="%Y%m%d_%H%M%S", utc=True)
+		# merge_asof needs the time key globally sorted, by="videoId" then makes it per video
+		self.statsIndex = df.sort_values("pollTimestamp", kind="stable").reset_index(drop=True)
+		print(f"Stats index: {len(df)} polls over {df['videoId'].nunique()} videos")
+		return self.statsIndex
+
+	def buildCommentIndex(self) -> pd.DataFrame:
+		# first snapshot each comment appeared in
+		rows = []
+		for filePath in globData(self.statsDir, "comments_*.json"):
+			try:
+				data = loadJson(filePath)
+			except Exception as e:
+				print(f"Error reading comments from {filePath.name}: {e}")
+				continue
+			videoId = data.get("videoId")
+			for snapshot in data.get("history", []):
+				for comment in snapshot.get("comments", []):
+					rows.append((videoId, comment.get("text"), comment.get("publishedAt"), snapshot.get("fetchedAt")))
+
+		df = pd.DataFrame(rows, columns=["videoId", "text", "publishedAt", "fetchedAt"])
+		df["fetchedAt"] = pd.to_datetime(df["fetchedAt"], format="%Y%m%d_%H%M%S", utc=True)
+		df = df.sort_values("fetchedAt", kind="stable").drop_duplicates(["videoId", "text", "publishedAt"], keep="first")
+		self.commentIndex = df.reset_index(drop=True)
+		print(f"Comment index: {len(df)} comments")
+		return self.commentIndex
+
+	# join
+
+	def join(self, records: List[Dict[str, Any]]) -> pd.DataFrame:
+		"""
+		Returns: one row per sentiment record with the prior engagement snapshot attached
+		(NaN engagement when no poll exists before the event)
+		"""
+		if self.statsIndex is None:
+			self.buildStatsIndex()
+
+		df = pd.DataFrame.from_records(records)
+		if df.empty:
+			return df
+
+		scores = pd.DataFrame(df["sentiment"].tolist(), index=df.index)
+		df = df.drop(columns=["sentiment"]).join(scores)
+		df["publishedAt"] = pd.to_datetime(df["publishedAt"], utc=True, errors="coerce")
+		df["processedAt"] = pd.to_datetime(df["processedAt"], utc=True, errors="coerce")
+
+		isComment = df["source"] == "comment"
+		if self.timeKey == "fetchedAt":
+			if self.commentIndex is None:
+				self.buildCommentIndex()
+			index = self.commentIndex.copy()
+			index["publishedAt"] = pd.to_datetime(index["publishedAt"], utc=True, errors="coerce")
+			df = df.merge(index, on=["videoId", "text", "publishedAt"], how="left")
+			# comments missing from the history files (older collection format) fall back to publishedAt
+			df["eventTime"] = df["fetchedAt"].fillna(df["publishedAt"]).where(isComment.values, df["processedAt"])
+		else:
+			df["eventTime"] = df["publishedAt"].where(isComment, df["processedAt"])
+
+		df = df.dropna(subset=["eventTime"]).sort_values("eventTime", kind="stable")
+		# same dtype on both sides even when one of them is empty
+		df["videoId"] = df["videoId"].astype(str)
+		stats = self.statsIndex.astype({"videoId": str})
+		joined = pd.merge_asof(
+			df,
+			stats,
+			left_on="eventTime",
+			right_on="pollTimestamp",
+			by="videoId",
+			direction="backward",
+			tolerance=self.tolerance
+		)
+		joined["pollLagSeconds"] = (joined["eventTime"] - joined["pollTimestamp"]).dt.total_seconds()
+		return joined
+
+	# incremental output
+
+	def _loadState(self) -> Dict[str, Any]:
+		if self.stateFile.exists():
+			with open(self.stateFile, "r", encoding="utf-8") as f:
+				state = json.load(f)
+			state["seen"] = set(state.get("seen", []))
+			return state
+		return {"files": {}, "seen": set(), "csvBytes": 0}
+
+	def _saveState(self, state: Dict[str, Any]):
+		writeJson({"files": state["files"], "seen": sorted(state["seen"]), "csvBytes": state.get("csvBytes")}, self.stateFile)
+
+	def _truncateOutput(self, state: Dict[str, Any]):
+		# anything past csvBytes was appended by a run that died before saving its state
+		if state.get("csvBytes") is None or not self.outputFile.exists():
+			return
+		if self.outputFile.stat().st_size > state["csvBytes"]:
+			print(f"Dropping rows of an interrupted join from {self.outputFile}")
+			with open(self.outputFile, "r+b") as f:
+				f.truncate(state["csvBytes"])
+
+	def reset(self):
+		# forget previous output so the next run joins everything again
+		for path in (self.outputFile, self.stateFile):
+			if path.exists():
+				os.remove(path)
+
+	def _outputMatches(self, columns=None) -> bool:
+		# appending under a different header (e.g. after changing timeKey) would misalign every column
+		if not self.outputFile.exists():
+			return True
+		header = list(pd.read_csv(self.outputFile, nrows=0).columns)
+		if columns is None:
+			# before anything is joined only timeKey is known, fetchedAt mode adds the fetchedAt column
+			return ("fetchedAt" in header) == (self.timeKey == "fetchedAt")
+		return header == list(columns)
+
+	def _rebuildOutput(self) -> int:
+		backup = self.outputFile.with_name(f"{self.outputFile.name}.{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.bak")
+		print(f"{self.outputFile} has different columns, moved to {backup} and rebuilding")
+		os.replace(self.outputFile, backup)
+		self.reset()
+		return self.run()
+
+	def run(self) -> int:
+		"""
+		joins every sentiment file not joined yet and appends the rows to outputFile
+		Returns: rows written this run
+		"""
+		state = self._loadState()
+		self._truncateOutput(state)
+		if not self._outputMatches():
+			return self._rebuildOutput()
+
+		sentimentFiles = globData(self.sentimentDir, "sentiment_merged.json") + globData(self.sentimentDir, "sentiment_multi_source_*.json")
+		todo = []
+		for filePath in sentimentFiles:
+			stat = filePath.stat()
+			fingerprint = f"{stat.st_size}:{int(stat.st_mtime)}"
+			if state["files"].get(filePath.name) != fingerprint:
+				todo.append((filePath, fingerprint))
+
+		if not todo:
+			print("Sentiment/engagement join is up to date")
+			return 0
+
+		self.buildStatsIndex()
+		written = 0
+		for filePath, fingerprint in todo:
+			# sentiment files repeat the corpus each run, only join records we have not written before
+			records = []
+			for record in loadJson(filePath):
+				key = recordKey(record)
+				if key not in state["seen"]:
+					state["seen"].add(key)
+					records.append(record)
+
+			if records:
+				joined = self.join(records)
+				if not self._outputMatches(joined.columns):
+					return self._rebuildOutput()
+				os.makedirs(self.outputFile.parent, exist_ok=True)
+				joined.to_csv(self.outputFile, mode="a", header=not self.outputFile.exists(), index=False, encoding="utf-8")
+				written += len(joined)
+				state["csvBytes"] = self.outputFile.stat().st_size
+
+			state["files"][filePath.name] = fingerprint
+			# saved right after every append so an interrupted run picks up where it stopped
+			self._saveState(state)
+			print(f"{filePath.name}: {len(records)} new records joined")
+
+		print(f"Joined {written} sentiment rows into {self.outputFile}")
+		return written
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Attach prior engagement snapshots to sentiment records")
+	parser.add_argument("--time-key", default="publishedAt", choices=["publishedAt", "fetchedAt"],
+		help="Comment event time, when it was written or when we first fetched it")
+	parser.add_argument("--tolerance", help="Max gap between event and poll, e.g. 1D or 6h")
+	parser.add_argument("--rebuild", action="store_true", help="Discard previous output and join everything again")
+	args = parser.parse_args()
+
+	joiner = SentimentEngagementJoin(timeKey=args.time_key, tolerance=args.tolerance)
+	if args.rebuild:
+		joiner.reset()
+	joiner.run()
@@ -0,0 +1,134 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+# Shared readers/writers for files that compaction.py may have compressed
+# loaders go through these so compacted (cold) and raw (hot) data read the same way
+
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+
+
+def defaultCompression() -> str:
+	# zstd when the zstandard package is installed, gzip (stdlib) otherwise
+	try:
+		import zstandard
+		return "zstd"
+	except ImportError:
+		return "gzip"
+
+
+def compressedSuffix(compression: str) -> str:
+	return {"zstd": ".zst", "gzip": ".gz"}[compression]
+
+
+def readBytes(path) -> bytes:
+	path = str(path)
+	with open(path, "rb") as f:
+		raw = f.read()
+	if path.endswith(".zst"):
+		try:
+			import zstandard
+		except ImportError:
+			raise RuntimeError(f"{path} is zstd compressed, install zstandard to read it")
+		return zstandard.ZstdDecompressor().decompress(raw)
+	if path.endswith(".gz"):
+		return gzip.decompress(raw)
+	return raw
+
+
+def loadJson(path) -> Any:
+	return json.loads(readBytes(path))
+
+
+def writeJson(data: Any, path, compression: str | None = None, indent: int | None = 4):
+	"""
+	writes json to path, compressed when compression is "zstd" or "gzip"
+	(path should already carry the matching suffix)
+	written to a temp file, fsynced and renamed over the target so a crash or Ctrl-C
+	leaves either the old file or the new one, never a truncated one
+	"""
+	path = str(path)
+	if compression:
+		raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+		if compression == "zstd":
+			import zstandard
+			raw = zstandard.ZstdCompressor(level=10).compress(raw)
+		else:
+			raw = gzip.compress(raw)
+	else:
+		raw = json.dumps(data, indent=indent).encode("utf-8")
+	_writeAtomic(raw, path)
+
+
+def writeCsv(df, path, **kwargs):
+	# DataFrame.to_csv with the same temp file + fsync + rename as writeJson, kwargs go to to_csv
+	_writeAtomic(df.to_csv(**kwargs).encode("utf-8"), str(path))
+
+
+def _writeAtomic(raw: bytes, path: str):
+	# unique temp name, stats and comment stages can write at the same time
+	tmpFile = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		with open(tmpFile, "wb") as f:
+			f.write(raw)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmpFile, path)
+	finally:
+		if os.path.exists(tmpFile):
+			os.remove(tmpFile)
+
+
+def findData(path) -> Path | None:
+	# the plain file or its compressed version, whichever exists
+	for candidate in [str(path)] + [str(path) + suffix for suffix in COMPRESSED_SUFFIXES]:
+		if os.path.exists(candidate):
+			return Path(candidate)
+	return None
+
+
+def isCompressed(path) -> bool:
+	return str(path).endswith(COMPRESSED_SUFFIXES)
+
+
+def globData(directory, pattern: str) -> List[Path]:
+	# pattern matches for plain .json files plus their compressed versions
+	directory = Path(directory)
+	files = list(directory.glob(pattern))
+	for suffix in COMPRESSED_SUFFIXES:
+		files.extend(directory.glob(pattern + suffix))
+	return sorted(files)
+
+
+def recordKey(record: Dict[str, Any]) -> str:
+	# short stable id of a sentiment record, sentiment files repeat the corpus so this is used to dedupe
+	raw = f"{record.get('videoId')}|{record.get('source')}|{record.get('publishedAt')}|{record.get('text')}"
+	return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def loadStatsPolls(statsDir) -> List[Tuple[str, List[Dict[str, Any]]]]:
+	"""
+	every stats poll, raw or compacted, oldest first
+	Returns: list of (poll stamp YYYYMMDD_HHMMSS, items)
+	"""
+	polls: Dict[str, List[Dict[str, Any]]] = {}
+
+	for filePath in globData(statsDir, "stats_delta_*.json"):
+		try:
+			stamp = filePath.name.split("stats_delta_")[1][:15]
+			polls.setdefault(stamp, []).extend(loadJson(filePath).get("items", []))
+		except Exception as e:
+			print(f"Error reading stats from {filePath.name}: {e}")
+
+	for filePath in globData(statsDir, "stats_compact_*.json"):
+		try:
+			for poll in loadJson(filePath).get("polls", []):
+				polls.setdefault(poll["polledAt"], []).extend(poll.get("items", []))
+		except Exception as e:
+			print(f"Error reading stats from {filePath.name}: {e}")
+
+	return sorted(polls.items())